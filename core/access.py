@@ -0,0 +1,72 @@
+from django.db import transaction
+from .models import Task, TaskAccess
+from .sync import record_lost_task_access
+
+
+# ---------------------------
+# Keeping TaskAccess in Sync
+# ---------------------------
+def set_owners(owners):
+    """
+    Record `{task_id: owner_id}`, replacing any previous owner rows.
+    """
+    old = TaskAccess.objects.filter(task_id__in=owners.keys(), role=TaskAccess.ROLE_OWNER)
+    replaced = {(task_id, user_id) for task_id, user_id in old.values_list('task_id', 'user_id')
+                if owners[task_id] != user_id}
+    old.delete()
+    TaskAccess.objects.bulk_create([
+        TaskAccess(task_id=task_id, user_id=user_id, role=TaskAccess.ROLE_OWNER)
+        for task_id, user_id in owners.items()
+    ], batch_size=1000, ignore_conflicts=True)
+    record_lost_task_access(replaced)
+
+
+def grant_assignees(pairs):
+    """
+    Record (task_id, user_id) assignments.
+    """
+    TaskAccess.objects.bulk_create([
+        TaskAccess(task_id=task_id, user_id=user_id, role=TaskAccess.ROLE_ASSIGNEE)
+        for task_id, user_id in pairs
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+def revoke_assignees(pairs):
+    """
+    Forget (task_id, user_id) assignments, grouped into one DELETE per task.
+    """
+    by_task = {}
+    for task_id, user_id in pairs:
+        by_task.setdefault(task_id, set()).add(user_id)
+    for task_id, user_ids in by_task.items():
+        TaskAccess.objects.filter(task_id=task_id, user_id__in=user_ids, role=TaskAccess.ROLE_ASSIGNEE).delete()
+    record_lost_task_access(pairs)
+
+
+def rebuild_task_access(chunk_size=5000):
+    """
+    Rewrite the whole table from Task.user and Task.assigned_to.
+    Returns the number of rows written.
+    """
+    through = Task.assigned_to.through
+    written = 0
+    with transaction.atomic():
+        TaskAccess.objects.all().delete()
+
+        owners = Task.objects.order_by().values_list('id', 'user_id').iterator(chunk_size=chunk_size)
+        batch = []
+        for task_id, user_id in owners:
+            batch.append(TaskAccess(task_id=task_id, user_id=user_id, role=TaskAccess.ROLE_OWNER))
+            if len(batch) == chunk_size:
+                written += len(TaskAccess.objects.bulk_create(batch))
+                batch = []
+
+        assignees = through.objects.order_by().values_list('task_id', 'user_id').iterator(chunk_size=chunk_size)
+        for task_id, user_id in assignees:
+            batch.append(TaskAccess(task_id=task_id, user_id=user_id, role=TaskAccess.ROLE_ASSIGNEE))
+            if len(batch) == chunk_size:
+                written += len(TaskAccess.objects.bulk_create(batch))
+                batch = []
+
+        written += len(TaskAccess.objects.bulk_create(batch))
+    return written
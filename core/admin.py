@@ -3,7 +3,9 @@ from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import (UserProfile, Task, Reminder, Complaint, Notification, Tag, TaskStep)
+from .models import (UserProfile, Task, Reminder, Complaint, Notification, Tag, TaskStep, OutboxEmail,
+                     ComplaintRollup, ComplaintStatusChange, ArchivedNotification)
+from .stats import complaint_breakdown, resolution_percentiles
 
 
 # ---------------------------
@@ -75,14 +77,75 @@ class ReminderAdmin(admin.ModelAdmin):
 # ---------------------------
 # Complaint Admin
 # ---------------------------
+class ComplaintStatusChangeInline(admin.TabularInline):
+    model = ComplaintStatusChange
+    fields = readonly_fields = ('from_status', 'to_status', 'changed_at')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
-    list_display = ('subject', 'user', 'status', 'created_at')
+    list_display = ('subject', 'user', 'status', 'created_at', 'resolved_at')
+    inlines = [ComplaintStatusChangeInline]
     search_fields = ('subject', 'message', 'user__username')
     list_filter = ('status', 'created_at')
     ordering = ('-created_at',)
 
 
+# ---------------------------
+# Complaint Rollup Admin (dashboard)
+# ---------------------------
+@admin.register(ComplaintRollup)
+class ComplaintRollupAdmin(admin.ModelAdmin):
+    """
+    Read-only. The changelist opens with a type × status matrix, for all
+    complaints or the tag picked in the filter, and resolution-time
+    percentiles per type over the last 30 days.
+    """
+    list_display = ('complaint_type', 'status', 'tag', 'count')
+    list_filter = ('status', 'complaint_type', 'tag')
+    ordering = ('complaint_type', 'status')
+    change_list_template = 'admin/core/complaintrollup/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        tag_id = request.GET.get('tag__id__exact')
+        tag_id = int(tag_id) if tag_id and tag_id.isdigit() else None
+        breakdown = complaint_breakdown(tag_id)
+        statuses = [label for _, label in Complaint.STATUS_CHOICES]
+
+        rows = [
+            (dict(Complaint.COMPLAINT_TYPES).get(t, t), list(counts.values()), sum(counts.values()))
+            for t, counts in breakdown.items()
+        ]
+        totals = [sum(col) for col in zip(*(counts for _, counts, _ in rows))]
+        extra_context = {
+            **(extra_context or {}),
+            'matrix_statuses': statuses,
+            'matrix_rows': rows,
+            'matrix_totals': totals,
+            'matrix_total': sum(totals),
+            'matrix_tag': Tag.objects.filter(pk=tag_id).first() if tag_id else None,
+            'resolution_times': [
+                (dict(Complaint.COMPLAINT_TYPES).get(t, t), stats)
+                for t, stats in sorted(resolution_percentiles().items())
+            ],
+        }
+        return super().changelist_view(request, extra_context)
+
+
 # ---------------------------
 # Notification Admin
 # ---------------------------
@@ -94,10 +157,29 @@ class NotificationAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'message', 'category', 'created_at', 'archived_at')
+    search_fields = ('message', 'user__username')
+    list_filter = ('category', 'archived_at')
+    ordering = ('-created_at',)
+
+
 # ---------------------------
 # Tag Admin
 # ---------------------------
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name',)
-    search_fields = ('name',)
\ No newline at end of file
+    search_fields = ('name',)
+
+
+# ---------------------------
+# Email Outbox Admin
+# ---------------------------
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    search_fields = ('subject',)
+    list_filter = ('status', 'created_at')
+    ordering = ('-created_at',)
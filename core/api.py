@@ -0,0 +1,122 @@
+import json
+from collections import defaultdict
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Task, Complaint
+
+# Public field name -> column read with values()
+TASK_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'due_date': 'due_date',
+    'is_completed': 'is_completed',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'owner': 'user__username',
+}
+
+# Many-to-many fields, loaded with one query per batch of tasks
+TASK_RELATED = {
+    'assigned_to': (Task.assigned_to.through, 'task_id', 'user__username'),
+    'tags': (Task.tags.through, 'task_id', 'tag__name'),
+}
+
+COMPLAINT_FIELDS = {
+    'id': 'id',
+    'complaint_type': 'complaint_type',
+    'subject': 'subject',
+    'message': 'message',
+    'status': 'status',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'owner': 'user__username',
+}
+
+COMPLAINT_RELATED = {
+    'tags': (Complaint.tags.through, 'complaint_id', 'tag__name'),
+}
+
+STREAM_CHUNK_SIZE = 2000
+
+
+# ---------------------------
+# Sparse Fieldsets
+# ---------------------------
+def parse_fields(value):
+    """
+    Field names from a `fields=a,b,c` parameter (every field if empty).
+    Raises ValueError naming any unknown field.
+    """
+    if not value:
+        return [*TASK_FIELDS, *TASK_RELATED]
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in TASK_FIELDS and f not in TASK_RELATED]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def task_rows(queryset, fields, extra=()):
+    """
+    values() over just the columns the fields need, plus `extra`
+    (e.g. the ordering columns a paginator reads back).
+    """
+    columns = {'id', *extra, *(TASK_FIELDS[f] for f in fields if f in TASK_FIELDS)}
+    return queryset.values(*columns)
+
+
+def _serialize(rows, fields, columns, related_fields):
+    related = {}
+    ids = [row['id'] for row in rows]
+    for name in fields:
+        if name in related_fields and ids:
+            through, key, column = related_fields[name]
+            related[name] = defaultdict(list)
+            for object_id, value in through.objects.filter(**{f'{key}__in': ids}).values_list(key, column):
+                related[name][object_id].append(value)
+
+    return [
+        {name: related[name][row['id']] if name in related else row[columns[name]] for name in fields}
+        for row in rows
+    ]
+
+
+def serialize_tasks(rows, fields):
+    """
+    Plain dicts with the requested fields, in the requested order.
+    Related fields cost one query each for the whole batch.
+    """
+    return _serialize(rows, fields, TASK_FIELDS, TASK_RELATED)
+
+
+def complaint_rows(queryset, extra=()):
+    return queryset.values(*{'id', *extra, *COMPLAINT_FIELDS.values()})
+
+
+def serialize_complaints(rows):
+    """
+    Every complaint field (see serialize_tasks).
+    """
+    return _serialize(rows, [*COMPLAINT_FIELDS, *COMPLAINT_RELATED], COMPLAINT_FIELDS, COMPLAINT_RELATED)
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+# ---------------------------
+# NDJSON Streaming
+# ---------------------------
+def stream_tasks(queryset, fields, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield NDJSON, one chunk of lines at a time. Rows come from a
+    server-side iterator, so memory stays flat however many tasks match.
+    """
+    batch = []
+    for row in task_rows(queryset, fields).iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) == chunk_size:
+            yield ''.join(dumps(task) + '\n' for task in serialize_tasks(batch, fields))
+            batch = []
+    if batch:
+        yield ''.join(dumps(task) + '\n' for task in serialize_tasks(batch, fields))
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+from .models import Task, TaskAccess, Reminder
+from .access import grant_assignees, revoke_assignees
+from .search import index_objects, remove_objects
+from .stats import bump_counters, count_assignments
+from .sync import record_deleted_tasks
+from .muting import muted
+
+ACTIONS = ('complete', 'reassign', 'tag', 'delete')
+
+
+# ---------------------------
+# Authorization
+# ---------------------------
+def allowed_task_ids(user, task_ids, action):
+    """
+    The subset of `task_ids` the user may apply `action` to, in one query.
+    Completing needs an assignment (as on the task page); everything else
+    needs ownership. Superusers may do anything.
+    """
+    tasks = Task.objects.filter(id__in=task_ids)
+    if not user.is_superuser:
+        role = TaskAccess.ROLE_ASSIGNEE if action == 'complete' else TaskAccess.ROLE_OWNER
+        tasks = tasks.filter(id__in=TaskAccess.objects.filter(user=user, role=role).values('task_id'))
+    return list(tasks.values_list('id', flat=True))
+
+
+# ---------------------------
+# Operations
+# ---------------------------
+def _people_by_task(task_ids):
+    """
+    {task_id: {user ids with access}} in one query.
+    """
+    people = defaultdict(set)
+    for task_id, user_id in TaskAccess.objects.filter(task_id__in=task_ids).values_list('task_id', 'user_id'):
+        people[task_id].add(user_id)
+    return people
+
+
+def complete_tasks(task_ids):
+    """
+    Mark the tasks completed. Returns how many changed.
+    """
+    with transaction.atomic():
+        pending = list(Task.objects.filter(id__in=task_ids, is_completed=False).values_list('id', flat=True))
+        if not pending:
+            return 0
+        Task.objects.filter(id__in=pending).update(is_completed=True, updated_at=timezone.now())
+
+        deltas = defaultdict(lambda: defaultdict(int))
+        for user_ids in _people_by_task(pending).values():
+            for uid in user_ids:
+                deltas[uid]['completed_tasks'] += 1
+        bump_counters(deltas)
+    return len(pending)
+
+
+def reassign_tasks(task_ids, user_ids):
+    """
+    Make `user_ids` the assignees of every task (an empty list unassigns).
+    Returns how many assignments were added and removed.
+    """
+    through = Task.assigned_to.through
+    user_ids = set(user_ids)
+
+    with transaction.atomic():
+        current = set(through.objects.filter(task_id__in=task_ids).values_list('task_id', 'user_id'))
+        wanted = {(task_id, user_id) for task_id in task_ids for user_id in user_ids}
+        removed, added = current - wanted, wanted - current
+
+        if removed:
+            through.objects.filter(task_id__in=task_ids).exclude(user_id__in=user_ids).delete()
+            count_assignments(removed, -1)
+            revoke_assignees(removed)
+        if added:
+            through.objects.bulk_create(
+                [through(task_id=task_id, user_id=user_id) for task_id, user_id in added],
+                batch_size=1000, ignore_conflicts=True,
+            )
+            count_assignments(added, 1)
+            grant_assignees(added)
+
+        index_objects(Task, {task_id for task_id, _ in removed | added})
+        Task.objects.filter(id__in=task_ids).update(updated_at=timezone.now())
+    return len(added), len(removed)
+
+
+def tag_tasks(task_ids, tag_id):
+    """
+    Add the tag to every task. Returns how many tasks gained it.
+    """
+    through = Task.tags.through
+    with transaction.atomic():
+        tagged = set(through.objects.filter(task_id__in=task_ids, tag_id=tag_id).values_list('task_id', flat=True))
+        gained = set(task_ids) - tagged
+        through.objects.bulk_create(
+            [through(task_id=task_id, tag_id=tag_id) for task_id in gained],
+            batch_size=1000, ignore_conflicts=True,
+        )
+        # Tags are part of the sync payload
+        Task.objects.filter(id__in=gained).update(updated_at=timezone.now())
+    return len(gained)
+
+
+def delete_tasks(task_ids):
+    """
+    Delete the tasks and everything that cascades from them, updating
+    counters, inbox versions and the search index in bulk.
+    Returns how many tasks were deleted.
+    """
+    with transaction.atomic():
+        tasks = dict(Task.objects.filter(id__in=task_ids).values_list('id', 'is_completed'))
+        if not tasks:
+            return 0
+
+        deltas = defaultdict(lambda: defaultdict(int))
+        for task_id, user_id, role in TaskAccess.objects.filter(
+                task_id__in=tasks).values_list('task_id', 'user_id', 'role'):
+            counters = deltas[user_id]
+            if role == TaskAccess.ROLE_OWNER:
+                counters['created_tasks'] -= 1
+            else:
+                counters['assigned_tasks'] -= 1
+            counters['inbox_version'] = 1   # their reminders on these tasks go away
+
+        # total/completed count each visible task once, whatever the roles
+        for task_id, user_ids in _people_by_task(tasks).items():
+            for uid in user_ids:
+                deltas[uid]['total_tasks'] -= 1
+                deltas[uid]['completed_tasks'] -= int(tasks[task_id])
+
+        for uid in Reminder.objects.filter(task_id__in=tasks, created_by__isnull=False).values_list(
+                'created_by', flat=True).distinct():
+            deltas[uid]['inbox_version'] = 1
+
+        bump_counters(deltas)
+        remove_objects(Task, tasks)
+        record_deleted_tasks(tasks)
+        # Counters, the search index and tombstones are done above: skip the per-task receivers
+        with muted('tasks'):
+            Task.objects.filter(id__in=tasks).delete()
+    return len(tasks)
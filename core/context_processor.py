@@ -1,8 +1,10 @@
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+from .stats import unread_count
 
 def global_context(request):
     """
     Adds unread notification count and chat unread count globally to all templates.
+    The count is lazy and cached, so pages that never show it never pay for it.
     """
     if not request.user.is_authenticated:
         return {
@@ -11,5 +13,5 @@ def global_context(request):
         }
 
     return {
-        "notifications_unread": Notification.objects.filter(user=request.user, is_read=False).count(),
+        "notifications_unread": SimpleLazyObject(lambda: unread_count(request.user)),
             }
@@ -0,0 +1,88 @@
+from itertools import groupby
+from django.db import transaction
+from django.utils import timezone
+from .models import Notification
+from .outbox import make_email, queue_emails
+
+
+# ---------------------------
+# Preferences
+# ---------------------------
+def wants_email(profile, notification):
+    """
+    Reminders follow UserProfile.reminder_email, everything else notify_email.
+    """
+    if profile is None:
+        return False
+    if notification.category == Notification.CATEGORY_REMINDER:
+        return profile.reminder_email
+    return profile.notify_email
+
+
+# ---------------------------
+# Digest Building
+# ---------------------------
+def build_digest(user, notifications):
+    """
+    One email summarising a user's notifications, or None if empty.
+    """
+    if not notifications:
+        return None
+
+    lines = [
+        f"• [{n.get_category_display()}] {n.message} "
+        + (f"×{n.repeat_count} " if n.repeat_count > 1 else "")
+        + f"({timezone.localtime(n.created_at).strftime('%d-%m-%Y %H:%M')})"
+        for n in notifications
+    ]
+    count = len(notifications)
+    return make_email(
+        subject=f"You have {count} new notification{'s' if count != 1 else ''}",
+        body=f"Hello {user.userprofile.full_name},\n\n"
+             f"Here is what happened since your last update:\n\n"
+             + "\n".join(lines) +
+             "\n\nRegards,\nYour Team",
+        to=[user.email],
+    )
+
+
+def send_digests(batch_size=200, before=None):
+    """
+    Queue one digest email per user for every notification flagged
+    send_email that has not been emailed yet, then mark them emailed.
+    Works through users in batches, with one notification query per batch.
+    Returns (users emailed, notifications included).
+    """
+    before = before or timezone.now()
+    pending = Notification.objects.filter(
+        send_email=True, emailed_at__isnull=True, created_at__lte=before
+    )
+    user_ids = list(pending.order_by().values_list('user_id', flat=True).distinct())
+
+    users_emailed = included = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch_ids = user_ids[start:start + batch_size]
+
+        with transaction.atomic():
+            rows = list(
+                pending.filter(user_id__in=batch_ids)
+                .select_related('user__userprofile')
+                .order_by('user_id', 'created_at')
+            )
+
+            emails = []
+            for _, group in groupby(rows, key=lambda n: n.user_id):
+                group = list(group)
+                user = group[0].user
+                profile = getattr(user, 'userprofile', None)
+                wanted = [n for n in group if wants_email(profile, n)]
+                if user.email and wanted:
+                    emails.append(build_digest(user, wanted))
+                    included += len(wanted)
+
+            queue_emails(emails)
+            # Mark everything fetched, including what the user opted out of
+            Notification.objects.filter(id__in=[n.pk for n in rows]).update(emailed_at=timezone.now())
+            users_emailed += len(emails)
+
+    return users_emailed, included
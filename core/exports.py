@@ -0,0 +1,69 @@
+import csv
+import heapq
+import io
+from operator import itemgetter
+from .models import Task, Complaint, Reminder
+
+HISTORY_HEADER = ['Type', 'Title/Subject', 'Status', 'Date/Time']
+EXPORT_CHUNK_SIZE = 2000
+
+
+# ---------------------------
+# History Rows
+# ---------------------------
+def _history_sources(user, chunk_size):
+    """
+    One (timestamp, type, title, status) iterator per source, each newest
+    first and read with a server-side cursor.
+    """
+    tasks = (
+        (created_at, 'Task', title, 'Completed' if done else 'Pending')
+        for title, done, created_at in Task.objects.filter(user=user).order_by('-created_at')
+        .values_list('title', 'is_completed', 'created_at').iterator(chunk_size=chunk_size)
+    )
+    complaints = (
+        (created_at, 'Complaint', subject, status)
+        for subject, status, created_at in Complaint.objects.filter(user=user).order_by('-created_at')
+        .values_list('subject', 'status', 'created_at').iterator(chunk_size=chunk_size)
+    )
+    reminders = (
+        (reminder_time, 'Reminder', title, '')
+        for title, reminder_time in Reminder.objects.filter(created_by=user).order_by('-reminder_time')
+        .values_list('title', 'reminder_time').iterator(chunk_size=chunk_size)
+    )
+    return tasks, complaints, reminders
+
+
+def history_rows(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    The user's tasks, complaints and reminders as one stream, newest
+    first. Memory holds a chunk per source, however long the history.
+    """
+    return heapq.merge(*_history_sources(user, chunk_size), key=itemgetter(0), reverse=True)
+
+
+# ---------------------------
+# CSV Streaming
+# ---------------------------
+def stream_history_csv(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the history export as CSV text: the header straight away, then
+    `chunk_size` rows at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(HISTORY_HEADER)
+    yield flush()
+
+    for count, (when, kind, title, status) in enumerate(history_rows(user, chunk_size), 1):
+        writer.writerow([kind, title, status, when.strftime('%d-%m-%Y %H:%M')])
+        if count % chunk_size == 0:
+            yield flush()
+    yield flush()
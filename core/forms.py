@@ -3,7 +3,6 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q
 from .models import (Task, Reminder, Complaint, UserProfile, Comment, Tag)
 from typing import cast
 from django.forms import ModelMultipleChoiceField
@@ -115,8 +114,7 @@ class ReminderForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         if user and not user.is_superuser:
-            self.fields['task'].queryset = Task.objects.filter(Q(created_by=user) | Q(assigned_to=user) # type: ignore
-            )  
+            self.fields['task'].queryset = Task.objects.visible_to(user) # type: ignore
 
     def clean_reminder_time(self):
         reminder_time = self.cleaned_data.get('reminder_time')
@@ -0,0 +1,175 @@
+import re
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from django.utils.http import parse_etags
+from .models import Reminder, Notification, UserCounter
+from .stats import get_counters, unread_count, invalidate_unread_count
+from .reminders import audience_q, claim_due_reminders, claim_pending_triggers, dispatch_reminders
+
+ETAG_RE = re.compile(r'^"(\d+)-(\d+)"$')
+
+
+# ---------------------------
+# Read Watermark
+# ---------------------------
+# A notification is read when it was created at or before the user's
+# watermark (UserCounter.notifications_read_at), unless its own is_read
+# says otherwise: True and False are per-item exceptions, None follows
+# the watermark. "Mark all read" only moves the watermark.
+
+def read_watermark(user):
+    user_id = getattr(user, 'pk', user)
+    return UserCounter.objects.filter(user_id=user_id).values_list('notifications_read_at', flat=True).first()
+
+
+def unread_q(watermark):
+    if watermark is None:
+        return Q(is_read=False) | Q(is_read__isnull=True)
+    return Q(is_read=False) | Q(is_read__isnull=True, created_at__gt=watermark)
+
+
+def read_q(watermark):
+    if watermark is None:
+        return Q(is_read=True)
+    return Q(is_read=True) | Q(is_read__isnull=True, created_at__lte=watermark)
+
+
+# Each row's own user's watermark, for queries over many users at once
+JOINED_WATERMARK = 'user__counters__notifications_read_at'
+
+
+def unread_q_joined():
+    """
+    unread_q for notifications of many users, joining each user's watermark.
+    """
+    return Q(is_read=False) | Q(is_read__isnull=True) & (
+        Q(**{f'{JOINED_WATERMARK}__isnull': True}) | Q(created_at__gt=F(JOINED_WATERMARK)))
+
+
+def read_q_joined():
+    """
+    read_q for notifications of many users, joining each user's watermark.
+    """
+    return Q(is_read=True) | Q(is_read__isnull=True, created_at__lte=F(JOINED_WATERMARK))
+
+
+def read_state(flag, created_at, watermark):
+    """
+    Whether a notification with this is_read `flag` and creation time is read.
+    """
+    if flag is not None:
+        return flag
+    return watermark is not None and created_at <= watermark
+
+
+def is_read(notification, watermark):
+    return read_state(notification.is_read, notification.created_at, watermark)
+
+
+def mark_all_read(user):
+    """
+    Everything up to now counts as read. One write to the counter row,
+    plus clearing the (few) items the user explicitly kept unread.
+    """
+    get_counters(user)   # make sure the row exists
+    with transaction.atomic():
+        Notification.objects.filter(user=user, is_read=False).update(is_read=None)
+        UserCounter.objects.filter(user=user).update(
+            notifications_read_at=timezone.now(),
+            unread_notifications=0,
+            inbox_version=F('inbox_version') + 1,
+        )
+        invalidate_unread_count([user.pk])
+
+
+# ---------------------------
+# New Notifications
+# ---------------------------
+def pop_new_notification(user):
+    """
+    Return the newest unread notification the user has not seen as a popup,
+    marking it as popped. Returns None when there is nothing new.
+    """
+    notif = Notification.objects.filter(user=user, is_popped=False).filter(
+        unread_q(read_watermark(user))
+    ).order_by('-created_at').first()
+
+    if notif is None:
+        return None
+
+    notif.is_popped = True   # mark as shown
+    notif.save()
+
+    return {
+        "count": unread_count(user),
+        'has_new': True,
+        'title': notif.message[:50] if notif.message else "Notification",
+        'message': notif.message,
+        'category': notif.category,
+    }
+
+
+# ---------------------------
+# Due Reminders
+# ---------------------------
+def trigger_due_reminders(user):
+    """
+    Fire the user's due reminders (unless the scheduler does that) and
+    return every reminder that has not been shown to this user yet.
+    """
+    if not settings.REMINDER_SCHEDULER_ENABLED:
+        # One transaction, so a failed dispatch does not leave them claimed
+        with transaction.atomic():
+            dispatch_reminders(claim_due_reminders(user=user))
+
+    reminders = Reminder.objects.filter(
+        id__in=claim_pending_triggers(user)
+    ).select_related('task')
+
+    return [
+        {"id": r.pk, "title": r.title, "task": r.task.title}
+        for r in reminders
+    ]
+
+
+# ---------------------------
+# Inbox Version (ETags)
+# ---------------------------
+def inbox_version(user):
+    return get_counters(user).inbox_version
+
+
+def next_reminder_due(user):
+    """
+    Earliest reminder time among the user's untriggered reminders, or None.
+    """
+    return Reminder.objects.filter(is_triggered=False).filter(
+        audience_q(user)
+    ).aggregate(due=Min('reminder_time'))['due']
+
+
+def inbox_etag(version, next_due=None):
+    """
+    ETag for a polling response: the inbox version it was built from, plus
+    (for reminders) the moment the next reminder falls due.
+    """
+    due = int(next_due.timestamp()) if next_due else 0
+    return f'"{version}-{due}"'
+
+
+def etag_is_fresh(request, version):
+    """
+    True when the client's If-None-Match still describes the inbox: nothing
+    changed since it was issued and no reminder has fallen due in between.
+    """
+    now = timezone.now().timestamp()
+    for tag in parse_etags(request.headers.get('If-None-Match', '')):
+        match = ETAG_RE.match(tag)
+        if not match:
+            continue
+        tag_version, due = int(match.group(1)), int(match.group(2))
+        if tag_version == version and (due == 0 or now < due):
+            return True
+    return False
@@ -0,0 +1,118 @@
+"""
+core/management/commands/benchmark_search.py
+--------------------------------------------
+Compare the old icontains task search with the full-text index.
+
+• Generates --tasks synthetic tasks (default 1,000,000) with assignees
+• Times both approaches for a few queries (best of --repeat runs)
+• Everything runs in a transaction that is rolled back, unless --keep
+"""
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from core.access import grant_assignees, set_owners
+from core.models import Task
+from core.search import index_objects, search, search_backend
+
+WORDS = (
+    "invoice report server backup deploy review meeting budget client audit "
+    "payroll laptop printer network contract release migration training policy "
+    "onboarding database dashboard security ticket vendor schedule quarterly"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Benchmark icontains search against the full-text index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1_000_000,
+                            help="Synthetic tasks to generate (default: 1,000,000)")
+        parser.add_argument("--users", type=int, default=200,
+                            help="Synthetic users to spread them over (default: 200)")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Runs per query; the best time is reported (default: 3)")
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the generated data instead of rolling it back")
+
+    def handle(self, *args, **options):
+        if not search_backend():
+            self.stderr.write(self.style.ERROR("❌ Full-text search needs SQLite or PostgreSQL."))
+            return
+
+        with transaction.atomic():
+            owner = self.generate(options["tasks"], options["users"])
+            queries = ["invoice", "server backup", "quarterly audit report", "bench_user_7", "ref4242"]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{'query':<26}{'icontains':>12}{'full-text':>12}{'matches':>10}"
+            ))
+            for text in queries:
+                old = self.best_of(options["repeat"], lambda: self.icontains_page(owner, text))
+                new = self.best_of(options["repeat"], lambda: self.fulltext_page(owner, text))
+                matches = search(Task.objects.visible_to(owner), text).count()
+                self.stdout.write(f"{text:<26}{old * 1000:>10.1f}ms{new * 1000:>10.1f}ms{matches:>10}")
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING("\n↩️ Generated data rolled back (use --keep to keep it)."))
+
+    def generate(self, count, user_count):
+        started = time.monotonic()
+        users = User.objects.bulk_create(
+            [User(username=f"bench_user_{i}") for i in range(user_count)], batch_size=1000
+        )
+        rng = random.Random(42)
+        through = Task.assigned_to.through
+
+        for start in range(0, count, 10_000):
+            size = min(10_000, count - start)
+            tasks = Task.objects.bulk_create([
+                Task(
+                    title=" ".join(rng.sample(WORDS, 3)),
+                    # Plus one rare token per task, for selective queries
+                    description=" ".join(rng.choices(WORDS, k=12)) + f" ref{rng.randrange(100_000)}",
+                    user=rng.choice(users),
+                )
+                for _ in range(size)
+            ], batch_size=1000)
+            pairs = [(t.pk, u.pk) for t in tasks for u in rng.sample(users, 2)]
+            through.objects.bulk_create([
+                through(task_id=task_id, user_id=user_id) for task_id, user_id in pairs
+            ], batch_size=1000, ignore_conflicts=True)
+            # bulk_create skips the signals that keep these current
+            index_objects(Task, [t.pk for t in tasks])
+            set_owners({t.pk: t.user_id for t in tasks})
+            grant_assignees(pairs)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🧪 Generated {count} tasks in {time.monotonic() - started:.1f}s"
+        ))
+        return users[0]
+
+    def icontains_page(self, user, text):
+        """
+        The task_list search before the index existed.
+        """
+        return list(
+            Task.objects.filter(Q(user=user) | Q(assigned_to=user)).filter(
+                Q(title__icontains=text) |
+                Q(description__icontains=text) |
+                Q(user__username__icontains=text) |
+                Q(assigned_to__username__icontains=text)
+            ).order_by('-created_at').distinct()[:10]
+        )
+
+    def fulltext_page(self, user, text):
+        return list(search(Task.objects.visible_to(user), text).order_by('-search_rank', '-id')[:10])
+
+    def best_of(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
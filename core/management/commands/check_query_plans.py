@@ -0,0 +1,44 @@
+"""
+core/management/commands/check_query_plans.py
+---------------------------------------------
+Query-plan regression check for the hot lookups behind the views,
+the inbox poll, the reminder scheduler and the outbox/digest workers.
+
+• Seeds a few thousand rows in a transaction that is always rolled back
+• Runs EXPLAIN on every hot query and fails if any plan reads a whole table
+  (SQLite "SCAN <table>", PostgreSQL "Seq Scan" with enable_seqscan off)
+• The same check runs in the test suite (core.tests.QueryPlanTests);
+  this command prints the plans, e.g. to investigate a failure
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.query_plans import SUPPORTED_VENDORS, check_query_plans
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot queries against seeded data and fail on full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000,
+                            help="Tasks, complaints and reminders to seed (default: 2000)")
+        parser.add_argument("--verbose-plans", action="store_true",
+                            help="Print every plan, not just the failing ones")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError("Query plans can only be checked on SQLite or PostgreSQL.")
+
+        failures = []
+        for name, plan, scans in check_query_plans(options["rows"]):
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"❌ {name}: full scan of {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✅ {name}"))
+            if scans or options["verbose_plans"]:
+                for line in plan:
+                    self.stdout.write(f"      {line}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries fall back to a full table scan.")
+        self.stdout.write(self.style.SUCCESS("\n🚀 Every hot query uses an index."))
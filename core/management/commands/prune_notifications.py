@@ -0,0 +1,51 @@
+"""
+core/management/commands/prune_notifications.py
+-----------------------------------------------
+Move read notifications past their category's retention into the archive
+table (or delete them).
+
+• Retention per category: NOTIFICATION_RETENTION_DAYS (0 keeps forever)
+• Archives unless NOTIFICATION_ARCHIVE is False or --delete is given
+• Unread notifications and ones waiting for an email digest are kept
+• One short transaction per chunk; safe to run from cron while users work
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = "Archive or delete read notifications past their retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true",
+                            help="Delete instead of archiving")
+        parser.add_argument("--category", action="append", dest="categories",
+                            help="Only this category (repeatable)")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Rows per transaction (default NOTIFICATION_PRUNE_CHUNK)")
+
+    def handle(self, *args, **options):
+        categories = options["categories"]
+        unknown = set(categories or ()) - set(settings.NOTIFICATION_RETENTION_DAYS)
+        if unknown:
+            raise CommandError(f"Unknown category: {', '.join(sorted(unknown))}")
+
+        archive = False if options["delete"] else None
+        verb = "Deleted" if options["delete"] or not settings.NOTIFICATION_ARCHIVE else "Archived"
+
+        started = time.monotonic()
+        totals, chunks = {}, 0
+        for category, rows in prune_notifications(archive, categories, options["chunk_size"]):
+            totals[category] = totals.get(category, 0) + rows
+            chunks += 1
+        elapsed = time.monotonic() - started
+
+        total = sum(totals.values())
+        for category, rows in totals.items():
+            self.stdout.write(f"   {category}: {rows}")
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"🗄️ {verb} {total} notifications in {chunks} chunks, {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
@@ -0,0 +1,27 @@
+"""
+core/management/commands/prune_sync_tombstones.py
+-------------------------------------------------
+Delete delta-sync tombstones older than SYNC_TOMBSTONE_DAYS.
+
+• Sync tokens expire after the same number of days, so clients that old
+  resync in full and never need the pruned rows
+• Safe to run from cron as often as you like
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Keep this many days instead of SYNC_TOMBSTONE_DAYS")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        deleted = prune_tombstones(options["days"])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"🧹 Deleted {deleted} tombstones in {elapsed:.2f}s"))
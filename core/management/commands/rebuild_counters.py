@@ -0,0 +1,35 @@
+"""
+core/management/commands/rebuild_counters.py
+--------------------------------------------
+Rebuild the per-user dashboard counters (core.UserCounter) from scratch.
+
+• Recomputes task, complaint and unread-notification counts with grouped queries
+• Use --user to rebuild only specific usernames
+• Safe to run at any time (rows are upserted)
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from core.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user task/complaint/notification counters from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="usernames", default=[],
+                            help="Only rebuild this username (can be repeated)")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["usernames"]:
+            user_ids = list(User.objects.filter(username__in=options["usernames"]).values_list("id", flat=True))
+            if not user_ids:
+                self.stderr.write(self.style.ERROR("❌ No matching users found."))
+                return
+
+        started = time.monotonic()
+        written = rebuild_counters(user_ids)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt counters for {written} users in {elapsed:.2f}s"))
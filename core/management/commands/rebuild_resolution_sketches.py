@@ -0,0 +1,28 @@
+"""
+core/management/commands/rebuild_resolution_sketches.py
+-------------------------------------------------------
+Rebuild the daily time-to-resolution sketches (core.ResolutionSketch).
+
+• One pass over the resolved complaints, streamed with iterator()
+• Kept current by signals; run this after bulk imports or raw SQL changes
+• Prints p50/p90/p99 per complaint type for the last 30 days when done
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.stats import rebuild_resolution_sketches, resolution_percentiles
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-type, per-day time-to-resolution sketches."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild_resolution_sketches()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} sketches in {elapsed:.2f}s"))
+        for complaint_type, stats in sorted(resolution_percentiles().items()):
+            self.stdout.write(
+                f"   {complaint_type:<20} n={stats['count']:<6} "
+                f"p50={stats['p50']}  p90={stats['p90']}  p99={stats['p99']}"
+            )
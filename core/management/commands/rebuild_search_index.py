@@ -0,0 +1,30 @@
+"""
+core/management/commands/rebuild_search_index.py
+------------------------------------------------
+Rebuild the full-text search index for tasks and complaints from scratch.
+
+• SQLite uses an FTS5 table, PostgreSQL a tsvector column with a GIN index
+• The index is kept current on save/delete; run this after bulk imports
+  or raw SQL changes that bypass signals
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.models import Task, Complaint
+from core.search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for tasks and complaints."
+
+    def handle(self, *args, **options):
+        if not search_backend():
+            self.stderr.write(self.style.ERROR("❌ Full-text search needs SQLite or PostgreSQL."))
+            return
+
+        for model in (Task, Complaint):
+            started = time.monotonic()
+            indexed = rebuild_index(model)
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Indexed {indexed} {model._meta.verbose_name_plural} in {elapsed:.2f}s"
+            ))
@@ -0,0 +1,23 @@
+"""
+core/management/commands/rebuild_task_access.py
+-----------------------------------------------
+Rebuild the task visibility table (core.TaskAccess) from scratch.
+
+• One owner row per task, one assignee row per assignment
+• Kept current by signals; run this after bulk imports or raw SQL
+  changes that bypass them
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.access import rebuild_task_access
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TaskAccess visibility table from tasks and assignments."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild_task_access()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {written} task access rows in {elapsed:.2f}s"))
@@ -0,0 +1,131 @@
+"""
+core/management/commands/run_reminder_scheduler.py
+--------------------------------------------------
+Long-running process that fires reminders on time, whether or not
+anybody has the app open.
+
+• Loads pending reminders into an in-memory min-heap keyed on reminder_time
+• Sleeps until the next one is due (or until the next refresh)
+• Picks up new and edited reminders incrementally via Reminder.updated_at
+• Fires due reminders in batches (bulk INSERTs; emails go to the outbox)
+• A batch that fails is rolled back, reported and retried after the next refresh
+
+Set REMINDER_SCHEDULER_ENABLED = True in settings while this runs, so
+saving a reminder no longer fires it inside the request.
+"""
+import heapq
+import time
+import traceback
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from core.models import Reminder
+from core.reminders import fire_reminders
+
+# Re-read rows saved slightly before the last high-water mark, in case
+# their transaction committed after we looked
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class Command(BaseCommand):
+    help = "Run the reminder scheduler (fires due reminders without a browser poll)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Maximum reminders fired per batch (default: 100)")
+        parser.add_argument("--refresh", type=float, default=30,
+                            help="Seconds between checks for new or edited reminders (default: 30)")
+        parser.add_argument("--once", action="store_true",
+                            help="Fire everything that is due now, then exit")
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.heap = []          # (reminder_time, id)
+        self.scheduled = {}     # id -> reminder_time currently in force
+        self.failed = set()     # ids whose batch failed, retried on the next sync
+        self.synced_at = None
+
+        self.sync()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"⏰ Scheduler started with {len(self.scheduled)} pending reminders"))
+
+        if options["once"]:
+            self.fire_due()
+            return
+
+        next_sync = time.monotonic() + options["refresh"]
+        try:
+            while True:
+                close_old_connections()
+                self.fire_due()
+
+                if time.monotonic() >= next_sync:
+                    self.sync()
+                    next_sync = time.monotonic() + options["refresh"]
+
+                # Sleep until the next reminder is due, but wake up for the next sync
+                wait = next_sync - time.monotonic()
+                if self.heap:
+                    wait = min(wait, (self.heap[0][0] - timezone.now()).total_seconds())
+                time.sleep(max(wait, 0.05))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\n⏹️ Scheduler stopped."))
+
+    def sync(self):
+        """
+        Load reminders created or edited since the last sync (all pending ones on start).
+        """
+        qs = Reminder.objects.all()
+        if self.synced_at is None:
+            qs = qs.filter(is_triggered=False)
+        else:
+            qs = qs.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP)
+
+        latest = self.synced_at
+        for pk, reminder_time, is_triggered, updated_at in qs.values_list(
+                "id", "reminder_time", "is_triggered", "updated_at").iterator(chunk_size=2000):
+            if latest is None or updated_at > latest:
+                latest = updated_at
+
+            if is_triggered:
+                self.scheduled.pop(pk, None)
+            elif self.scheduled.get(pk) != reminder_time:
+                # The old heap entry (if any) goes stale and is skipped when popped
+                self.scheduled[pk] = reminder_time
+                heapq.heappush(self.heap, (reminder_time, pk))
+
+        self.synced_at = latest or timezone.now()
+
+        # Retry failed batches once per refresh rather than on every tick
+        for pk in self.failed:
+            if pk in self.scheduled:
+                heapq.heappush(self.heap, (self.scheduled[pk], pk))
+        self.failed.clear()
+
+    def fire_due(self):
+        """
+        Pop every due reminder off the heap and fire them in batches.
+        A reminder stays scheduled until its batch has fired; a failed
+        batch is rolled back and retried after the next sync.
+        """
+        now = timezone.now()
+        due = {}
+        while self.heap and self.heap[0][0] <= now:
+            reminder_time, pk = heapq.heappop(self.heap)
+            if self.scheduled.get(pk) == reminder_time:
+                due[pk] = None   # a retried id can be on the heap twice
+
+        due = list(due)
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            try:
+                fired = fire_reminders(batch)
+            except Exception:
+                self.stderr.write(self.style.ERROR(
+                    f"❌ Error firing reminders {batch}, will retry:\n{traceback.format_exc()}"))
+                self.failed.update(batch)
+                continue
+            for pk in batch:
+                del self.scheduled[pk]
+            if fired:
+                self.stdout.write(self.style.SUCCESS(f"🔔 Fired {len(fired)} reminders"))
@@ -0,0 +1,44 @@
+"""
+core/management/commands/send_notification_digests.py
+-----------------------------------------------------
+Email each user one digest of their pending notifications.
+
+• Picks up notifications flagged send_email that were not emailed yet
+• One email per user per window (NOTIFICATION_DIGEST_WINDOW minutes)
+• Respects UserProfile.notify_email / reminder_email
+• Digests are queued in the outbox; `send_outbox` delivers them
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = "Queue one email digest per user for pending notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200,
+                            help="Users handled per query (default: 200)")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, sending a digest every NOTIFICATION_DIGEST_WINDOW minutes")
+
+    def handle(self, *args, **options):
+        window = settings.NOTIFICATION_DIGEST_WINDOW * 60
+        try:
+            while True:
+                close_old_connections()
+                started = time.monotonic()
+                users, notifications = send_digests(options["batch_size"])
+                elapsed = time.monotonic() - started
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"📨 Queued {users} digests covering {notifications} notifications in {elapsed:.2f}s"
+                ))
+
+                if not options["loop"]:
+                    return
+                time.sleep(max(window - elapsed, 0))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\n⏹️ Digest worker stopped."))
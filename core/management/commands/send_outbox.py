@@ -0,0 +1,49 @@
+"""
+core/management/commands/send_outbox.py
+---------------------------------------
+Deliver emails queued in the outbox (core.OutboxEmail).
+
+• Sends each batch over a single SMTP connection
+• Failed emails are retried with exponential backoff
+  (EMAIL_OUTBOX_RETRY_DELAY, up to EMAIL_OUTBOX_MAX_ATTEMPTS tries)
+• Several workers can run side by side (batches are leased, not shared)
+• Uses EMAIL_BACKEND, so it works with the locmem/console backends or a
+  local debugging SMTP server as well
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Emails sent per SMTP connection (default: 100)")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and poll the outbox")
+        parser.add_argument("--interval", type=float, default=10,
+                            help="Seconds between polls with --loop (default: 10)")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                started = time.monotonic()
+                sent, failed = drain_outbox(options["batch_size"])
+
+                if sent or failed:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(self.style.SUCCESS(f"📧 {sent} sent, {failed} failed in {elapsed:.2f}s"))
+                    if failed:
+                        self.stderr.write(self.style.WARNING(f"⚠️ {failed} emails will be retried or were given up on"))
+                elif not options["loop"]:
+                    self.stdout.write("📭 Outbox is empty.")
+
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\n⏹️ Outbox worker stopped."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('created_tasks', models.IntegerField(default=0)),
+                ('assigned_tasks', models.IntegerField(default=0)),
+                ('complaints', models.IntegerField(default=0)),
+                ('resolved_complaints', models.IntegerField(default=0)),
+                ('unread_notifications', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
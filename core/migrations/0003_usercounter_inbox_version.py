@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_usercounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounter',
+            name='inbox_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
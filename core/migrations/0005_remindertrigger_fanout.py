@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_reminder_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remindertrigger',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='remindertrigger',
+            name='reminder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='triggers', to='core.reminder'),
+        ),
+        migrations.AlterField(
+            model_name='remindertrigger',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_triggers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='remindertrigger',
+            index=models.Index(condition=models.Q(('triggered', False)), fields=['user'], name='reminder_trigger_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='remindertrigger',
+            constraint=models.UniqueConstraint(fields=('reminder', 'user'), name='unique_reminder_trigger'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Full-text search index for tasks and complaints (see core/search.py):
+# an FTS5 table on SQLite, a tsvector table with a GIN index on PostgreSQL.
+# Both are keyed on object_id, which the unmanaged *SearchEntry models map.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ASSIGNEES = {
+    'sqlite': "group_concat(u2.username, ' ')",
+    'postgresql': "string_agg(u2.username, ' ')",
+}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ASSIGNEES:
+        return
+
+    task_people = (
+        f"u.username || ' ' || COALESCE((SELECT {ASSIGNEES[vendor]} FROM core_task_assigned_to a "
+        f"JOIN auth_user u2 ON u2.id = a.user_id WHERE a.task_id = t.id), '')"
+    )
+    task_rows = (
+        f"SELECT t.id AS id, t.title AS title, t.description AS body, {task_people} AS people "
+        f"FROM core_task t JOIN auth_user u ON u.id = t.user_id"
+    )
+    complaint_rows = (
+        "SELECT c.id AS id, c.subject AS title, c.message AS body, u.username AS people "
+        "FROM core_complaint c JOIN auth_user u ON u.id = c.user_id"
+    )
+
+    for table, parent, rows in (('core_task_search', 'core_task', task_rows),
+                                ('core_complaint_search', 'core_complaint', complaint_rows)):
+        if vendor == 'sqlite':
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table} USING fts5(object_id UNINDEXED, "
+                f"title, body, people, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table} (rowid, object_id, title, body, people) "
+                f"SELECT id, id, title, body, people FROM ({rows}) AS docs"
+            )
+        else:
+            schema_editor.execute(
+                f"CREATE TABLE {table} ("
+                f"object_id integer PRIMARY KEY REFERENCES {parent} (id) "
+                f"ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table} (object_id, document) SELECT id, "
+                f"setweight(to_tsvector('simple', title), 'A') || "
+                f"setweight(to_tsvector('simple', body), 'B') || "
+                f"setweight(to_tsvector('simple', people), 'C') "
+                f"FROM ({rows}) AS docs"
+            )
+            schema_editor.execute(f"CREATE INDEX {table}_document_idx ON {table} USING GIN (document)")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ASSIGNEES:
+        schema_editor.execute("DROP TABLE IF EXISTS core_task_search")
+        schema_editor.execute("DROP TABLE IF EXISTS core_complaint_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_notification_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='ComplaintSearchEntry',
+            fields=[
+                ('complaint', models.OneToOneField(db_column='object_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.complaint')),
+            ],
+            options={
+                'db_table': 'core_complaint_search',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskSearchEntry',
+            fields=[
+                ('task', models.OneToOneField(db_column='object_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.task')),
+            ],
+            options={
+                'db_table': 'core_task_search',
+                'managed': False,
+            },
+        ),
+    ]
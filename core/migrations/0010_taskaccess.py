@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_task_access(apps, schema_editor):
+    """
+    One owner row per task and one assignee row per assignment.
+    """
+    Task = apps.get_model('core', 'Task')
+    TaskAccess = apps.get_model('core', 'TaskAccess')
+    through = Task.assigned_to.through
+
+    rows = [TaskAccess(task_id=t, user_id=u, role='owner')
+            for t, u in Task.objects.values_list('id', 'user_id').iterator()]
+    rows += [TaskAccess(task_id=t, user_id=u, role='assignee')
+             for t, u in through.objects.values_list('task_id', 'user_id').iterator()]
+    TaskAccess.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('assignee', 'Assignee')], max_length=10)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='core.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'task', 'role'), name='unique_task_access')],
+            },
+        ),
+        migrations.RunPython(backfill_task_access, migrations.RunPython.noop),
+    ]
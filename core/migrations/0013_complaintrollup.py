@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_complaint_rollups(apps, schema_editor):
+    """
+    One row per type and status, and one per type, status and tag.
+    """
+    Complaint = apps.get_model('core', 'Complaint')
+    ComplaintRollup = apps.get_model('core', 'ComplaintRollup')
+
+    rows = [ComplaintRollup(complaint_type=t, status=s, count=n)
+            for t, s, n in Complaint.objects.order_by().values_list('complaint_type', 'status').annotate(n=Count('id'))]
+    rows += [ComplaintRollup(complaint_type=t, status=s, tag_id=g, count=n)
+             for t, s, g, n in Complaint.tags.through.objects.order_by().values_list(
+                 'complaint__complaint_type', 'complaint__status', 'tag_id').annotate(n=Count('id'))]
+    ComplaintRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_type', models.CharField(choices=[('IT Support', 'IT Support'), ('Human Resources', 'Human Resources'), ('Facility Management', 'Facility Management'), ('Payroll/Finance', 'Payroll/Finance'), ('Operations', 'Operations'), ('Compliance', 'Compliance & Policy'), ('Software Issue', 'Software/App Issue'), ('Feature Request', 'Feature Request'), ('Other', 'Other')], max_length=25)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Resolved', 'Resolved')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='complaint_rollups', to='core.tag')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('complaint_type', 'status', 'tag'), name='unique_complaint_rollup'), models.UniqueConstraint(condition=models.Q(('tag__isnull', True)), fields=('complaint_type', 'status'), name='unique_complaint_rollup_total')],
+            },
+        ),
+        migrations.RunPython(backfill_complaint_rollups, migrations.RunPython.noop),
+    ]
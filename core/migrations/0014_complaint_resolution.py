@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:32
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+from core.sketches import QuantileSketch
+
+
+def backfill_resolutions(apps, schema_editor):
+    """
+    Resolution times were never stored: the last update of an already
+    resolved complaint is the best estimate. Then build the daily sketches.
+    """
+    Complaint = apps.get_model('core', 'Complaint')
+    ResolutionSketch = apps.get_model('core', 'ResolutionSketch')
+
+    resolved = Complaint.objects.filter(status='Resolved')
+    resolved.update(resolved_at=F('updated_at'))
+
+    sketches = defaultdict(QuantileSketch)
+    for complaint_type, created_at, resolved_at in resolved.values_list(
+            'complaint_type', 'created_at', 'resolved_at').iterator():
+        seconds = max((resolved_at - created_at).total_seconds(), 0)
+        sketches[(complaint_type, timezone.localdate(resolved_at))].add(seconds)
+    ResolutionSketch.objects.bulk_create([
+        ResolutionSketch(complaint_type=t, day=day, sketch=sketch.to_dict())
+        for (t, day), sketch in sketches.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_complaintrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ResolutionSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_type', models.CharField(choices=[('IT Support', 'IT Support'), ('Human Resources', 'Human Resources'), ('Facility Management', 'Facility Management'), ('Payroll/Finance', 'Payroll/Finance'), ('Operations', 'Operations'), ('Compliance', 'Compliance & Policy'), ('Software Issue', 'Software/App Issue'), ('Feature Request', 'Feature Request'), ('Other', 'Other')], max_length=25)),
+                ('day', models.DateField()),
+                ('sketch', models.JSONField(default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='resolution_sketch_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('complaint_type', 'day'), name='unique_resolution_sketch')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComplaintStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Resolved', 'Resolved')], max_length=20)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='core.complaint')),
+            ],
+            options={
+                'ordering': ['changed_at'],
+                'indexes': [models.Index(fields=['complaint', 'changed_at'], name='status_change_complaint_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_resolutions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def unread_follows_watermark(apps, schema_editor):
+    """
+    With no watermark yet, "not read" and "follows the watermark" mean the
+    same; store it as None so it does not count as a per-item exception.
+    """
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.filter(is_read=False).update(is_read=None)
+
+
+def unread_back_to_false(apps, schema_editor):
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.filter(is_read__isnull=True).update(is_read=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_complaint_resolution'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_unread_idx',
+        ),
+        migrations.AddField(
+            model_name='usercounter',
+            name='notifications_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='is_read',
+            field=models.BooleanField(default=None, null=True),
+        ),
+        migrations.RunPython(unread_follows_watermark, unread_back_to_false),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_popped', False)), fields=['user', '-created_at'], name='notification_popup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read__isnull', False)), fields=['user', 'created_at'], name='notification_read_idx'),
+        ),
+    ]
@@ -60,6 +60,38 @@ class Tag(models.Model):
 # ---------------------------
 # Task
 # ---------------------------
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Tasks the user created or is assigned to: one indexed lookup on
+        TaskAccess, with no OR and no DISTINCT.
+        """
+        return self.filter(id__in=TaskAccess.objects.filter(user=user).values('task_id'))
+
+    def assigned_ids(self, user):
+        """
+        Sub-select of the ids of tasks assigned to the user.
+        """
+        return TaskAccess.objects.filter(user=user, role=TaskAccess.ROLE_ASSIGNEE).values('task_id')
+
+    def with_tags(self, **filters):
+        """
+        Tasks carrying a tag that matches `filters`, without duplicating rows.
+        """
+        return self.filter(id__in=Task.tags.through.objects.filter(
+            **{f'tag__{k}': v for k, v in filters.items()}).values('task_id'))
+
+    def for_list(self):
+        """
+        Load everything a task table row renders: the owner joined in, and
+        assignees and tags prefetched with only the columns shown.
+        """
+        return self.select_related('user').prefetch_related(
+            models.Prefetch('assigned_to', queryset=User.objects.only('id', 'username')),
+            models.Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'color')),
+        )
+
+
 class Task(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -74,10 +106,47 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Task list pages, newest first (all tasks, and per owner)
+            models.Index(fields=['-created_at', '-id'], name='task_recent_idx'),
+            models.Index(fields=['user', '-created_at'], name='task_user_recent_idx'),
+            # Delta sync: tasks changed after a position
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class TaskAccess(models.Model):
+    """
+    Who can see a task and why: one row for the owner and one per assignee.
+    Kept in sync by core/signals.py, so visibility checks need no OR-join.
+    """
+    ROLE_OWNER = 'owner'
+    ROLE_ASSIGNEE = 'assignee'
+    ROLE_CHOICES = [
+        (ROLE_OWNER, 'Owner'),
+        (ROLE_ASSIGNEE, 'Assignee'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_access')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='access')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+
+    class Meta:
+        constraints = [
+            # Also the visibility index: (user) -> task ids, read from the index alone
+            models.UniqueConstraint(fields=['user', 'task', 'role'], name='unique_task_access'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} → {self.task} ({self.role})"
+
+
 # ---------------------------
 # Task Step
 # ---------------------------
@@ -104,15 +173,44 @@ class Reminder(models.Model):
     reminder_time = models.DateTimeField()
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     is_triggered = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Due-reminder claims and the scheduler's start-up load
+            models.Index(fields=['reminder_time'], condition=models.Q(is_triggered=False),
+                         name='reminder_pending_idx'),
+            # The scheduler's incremental sync
+            models.Index(fields=['updated_at'], name='reminder_updated_idx'),
+            # Reminder list and history for the reminder's creator
+            models.Index(fields=['created_by', '-reminder_time'], name='reminder_creator_time_idx'),
+        ]
 
     def __str__(self):
         return f"Reminder: {self.title} for {self.task.title}"
 
 
 class ReminderTrigger(models.Model):
-    reminder = models.ForeignKey(Reminder, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    """
+    One row per recipient of a fired reminder.
+    `triggered` flips to True once the reminder has been shown to that user.
+    """
+    reminder = models.ForeignKey(Reminder, on_delete=models.CASCADE, related_name='triggers')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminder_triggers')
     triggered = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reminder', 'user'], name='unique_reminder_trigger'),
+        ]
+        indexes = [
+            # Pending triggers per user (check_due_reminders)
+            models.Index(fields=['user'], condition=models.Q(triggered=False), name='reminder_trigger_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.reminder} → {self.user.username}"
 
 # ---------------------------
 # Complaint (Updated for Corporate Context)
@@ -144,11 +242,90 @@ class Complaint(models.Model):
     tags = models.ManyToManyField(Tag, blank=True, related_name="complaints")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set by core.signals when the status becomes Resolved, cleared if reopened
+    resolved_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Complaint list pages, unfiltered and by status; status counts
+            models.Index(fields=['-created_at', '-id'], name='complaint_recent_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='complaint_status_recent_idx'),
+            # A user's complaint history
+            models.Index(fields=['user', '-created_at'], name='complaint_user_recent_idx'),
+            # Delta sync: complaints changed after a position (all, or one author's)
+            models.Index(fields=['updated_at', 'id'], name='complaint_updated_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='complaint_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.status}"
     
 
+class ComplaintStatusChange(models.Model):
+    """
+    One row per status transition of a complaint (from_status is empty
+    when the complaint was created). Written by core.signals.
+    """
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['complaint', 'changed_at'], name='status_change_complaint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.complaint_id}: {self.from_status or '—'} → {self.to_status}"
+
+
+class ResolutionSketch(models.Model):
+    """
+    Quantile sketch (core.sketches.QuantileSketch) of the time to resolution,
+    in seconds, of the complaints of one type resolved on one day. Merging a
+    range of days gives p50/p90/p99 without reading the complaints.
+    """
+    complaint_type = models.CharField(max_length=25, choices=Complaint.COMPLAINT_TYPES)
+    day = models.DateField()
+    sketch = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['complaint_type', 'day'], name='unique_resolution_sketch'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='resolution_sketch_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.complaint_type} resolved on {self.day}"
+
+
+class ComplaintRollup(models.Model):
+    """
+    How many complaints have a given type and status, overall (tag empty)
+    or carrying a given tag. Kept current by core.signals; rebuild with
+    `python manage.py rebuild_complaint_rollups` if it drifts.
+    """
+    complaint_type = models.CharField(max_length=25, choices=Complaint.COMPLAINT_TYPES)
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    tag = models.ForeignKey(Tag, null=True, blank=True, on_delete=models.CASCADE, related_name='complaint_rollups')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['complaint_type', 'status', 'tag'], name='unique_complaint_rollup'),
+            # NULLs never collide in a unique index, so the untagged totals need their own
+            models.UniqueConstraint(fields=['complaint_type', 'status'], condition=models.Q(tag__isnull=True),
+                                    name='unique_complaint_rollup_total'),
+        ]
+
+    def __str__(self):
+        return f"{self.complaint_type} / {self.status} / {self.tag or 'all'}: {self.count}"
+
+
 # ---------------------------
 # Notification
 # ---------------------------
@@ -185,17 +362,209 @@ class Notification(models.Model):
         help_text="Whether email notification should be sent"
     )
     
-    is_read = models.BooleanField(default=False)
+    emailed_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When this notification went out in an email digest"
+    )
+
+    # None follows the user's read watermark; True/False are per-item
+    # exceptions to it (see core.inbox)
+    is_read = models.BooleanField(null=True, default=None)
     is_popped = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Repeats of the same (user, category, related_id) folded into this
+    # unread row instead of new rows (see core.notifications)
+    repeat_count = models.PositiveIntegerField(default=1)
+    repeated_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Notifications waiting for the next email digest
+            models.Index(fields=['user'], condition=models.Q(send_email=True, emailed_at__isnull=True),
+                         name='notification_digest_idx'),
+            # Keyset pagination of a user's notifications, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
+            # Notifications not yet shown as a popup, newest first
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_popped=False),
+                         name='notification_popup_idx'),
+            # Per-item read/unread exceptions to the read watermark
+            models.Index(fields=['user', 'created_at'], condition=models.Q(is_read__isnull=False),
+                         name='notification_read_idx'),
+            # Oldest notifications per category, for the retention pruner
+            models.Index(fields=['category', 'created_at', 'id'], name='notification_retention_idx'),
+            # Earlier notifications about the same object, for coalescing
+            models.Index(fields=['user', 'category', 'related_id'], condition=models.Q(related_id__isnull=False),
+                         name='notification_coalesce_idx'),
+        ]
 
     def __str__(self):
         return f"{self.category.title()} Notification → {self.user.username}: {self.message[:30]}"
 
 
+class ArchivedNotification(models.Model):
+    """
+    A read notification moved out of the live table by prune_notifications.
+    It keeps the id it had there.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    message = models.CharField(max_length=255)
+    category = models.CharField(max_length=20, choices=Notification.CATEGORY_CHOICES)
+    related_id = models.PositiveIntegerField(null=True, blank=True)
+    repeat_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='archived_notif_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived {self.category} notification → {self.user.username}: {self.message[:30]}"
+
+
+# ---------------------------
+# Email Outbox
+# ---------------------------
+class OutboxEmail(models.Model):
+    """
+    An email queued inside the transaction that caused it.
+    Delivered by `python manage.py send_outbox`.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list, help_text="List of recipient addresses")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # Not a partial index: status is compared with a bound parameter,
+            # which SQLite cannot match against an index condition
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
+
+
+# ---------------------------
+# Search Index
+# ---------------------------
+class TaskSearchEntry(models.Model):
+    """
+    A task's row in the full-text index (see core/search.py). The table is
+    an FTS5 table on SQLite and a tsvector table on PostgreSQL, created by
+    migration 0009, so Django does not manage it.
+    """
+    task = models.OneToOneField(Task, primary_key=True, db_column='object_id', db_constraint=False,
+                                on_delete=models.DO_NOTHING, related_name='search_entry')
+
+    class Meta:
+        managed = False
+        db_table = 'core_task_search'
+
+
+class ComplaintSearchEntry(models.Model):
+    """
+    A complaint's row in the full-text index (see TaskSearchEntry).
+    """
+    complaint = models.OneToOneField('Complaint', primary_key=True, db_column='object_id', db_constraint=False,
+                                     on_delete=models.DO_NOTHING, related_name='search_entry')
+
+    class Meta:
+        managed = False
+        db_table = 'core_complaint_search'
+
+
+# ---------------------------
+# Sync Tombstones
+# ---------------------------
+class SyncTombstone(models.Model):
+    """
+    A task or complaint that disappeared for a user (deleted, or their
+    access was removed), so delta-sync clients can drop it.
+    Written by core.sync; older than SYNC_TOMBSTONE_DAYS they are pruned.
+    """
+    KIND_TASK = 'task'
+    KIND_COMPLAINT = 'complaint'
+    KIND_CHOICES = [(KIND_TASK, 'Task'), (KIND_COMPLAINT, 'Complaint')]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    # No database constraint: deleting a user writes tombstones for the
+    # tasks and complaints that cascade with them, including their own
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_tombstones', db_constraint=False)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # A client's tombstones after its sync position (ids only grow)
+            models.Index(fields=['user', 'kind', 'id'], name='tombstone_user_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} gone for {self.user_id}"
+
+
+# ---------------------------
+# User Counters
+# ---------------------------
+class UserCounter(models.Model):
+    """
+    Per-user dashboard counters, kept up to date by core.signals.
+    Rebuild with `python manage.py rebuild_counters` if they drift.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='counters')
+
+    total_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    created_tasks = models.IntegerField(default=0)
+    assigned_tasks = models.IntegerField(default=0)
+
+    complaints = models.IntegerField(default=0)
+    resolved_complaints = models.IntegerField(default=0)
+
+    unread_notifications = models.IntegerField(default=0)
+    # Notifications created up to here count as read (see core.inbox)
+    notifications_read_at = models.DateTimeField(null=True, blank=True)
+
+    # Bumped whenever a notification or reminder affecting the user changes
+    inbox_version = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def pending_tasks(self):
+        return self.total_tasks - self.completed_tasks
+
+    def __str__(self):
+        return f"Counters → {self.user.username}"
+
+
 # ---------------------------
 # Comment
 # ---------------------------
@@ -209,6 +578,11 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Top-level comments of a task or complaint
+            models.Index(fields=['task', 'parent'], name='comment_task_parent_idx'),
+            models.Index(fields=['complaint', 'parent'], name='comment_complaint_parent_idx'),
+        ]
 
 
 # ---------------------------
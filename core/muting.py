@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_muted = ContextVar('muted_signals', default=frozenset())
+
+
+# ---------------------------
+# Signal Muting
+# ---------------------------
+@contextmanager
+def muted(name):
+    """
+    Receivers that check is_muted(name) do nothing inside this block,
+    because the caller makes the same changes set-based.
+    """
+    token = _muted.set(_muted.get() | {name})
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def is_muted(name):
+    return name in _muted.get()
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import Notification, UserProfile
+from .stats import bump_counters
+
+
+# ---------------------------
+# Coalescing
+# ---------------------------
+def _key(notification):
+    return notification.user_id, notification.category, notification.related_id
+
+
+def coalesce(notifications, now=None):
+    """
+    Fold notifications about the same object (user, category, related_id)
+    into one: repeats within the batch, and repeats of an unread row that
+    is not in a digest yet and was created or repeated in the last
+    NOTIFICATION_COALESCE_WINDOW minutes. That row gets the new message,
+    a higher repeat_count and pops up again.
+    Returns (notifications still to create, ids of users with a folded row).
+    """
+    from .inbox import unread_q_joined   # core.inbox imports this module (through core.reminders)
+    window = settings.NOTIFICATION_COALESCE_WINDOW
+    if not window:
+        return notifications, set()
+
+    fresh, keyed = [], {}
+    for n in notifications:
+        if n.related_id is None:
+            fresh.append(n)   # nothing to tell repeats apart from new messages
+        elif _key(n) in keyed:
+            first = keyed[_key(n)]
+            first.repeat_count += n.repeat_count
+            first.message = n.message
+        else:
+            keyed[_key(n)] = n
+    if not keyed:
+        return fresh, set()
+
+    now = now or timezone.now()
+    since = now - timedelta(minutes=window)
+    existing = {}
+    rows = (Notification.objects
+            .filter(user_id__in={k[0] for k in keyed}, category__in={k[1] for k in keyed},
+                    related_id__in={k[2] for k in keyed}, emailed_at__isnull=True)
+            .filter(Q(created_at__gte=since) | Q(repeated_at__gte=since))
+            .filter(unread_q_joined())
+            .order_by('id')
+            .values_list('id', 'user_id', 'category', 'related_id'))
+    for pk, *key in rows:
+        existing[tuple(key)] = pk   # the newest one wins
+
+    # One UPDATE per distinct (message, repeats), usually one in all
+    updates = defaultdict(list)
+    for key, n in keyed.items():
+        if key in existing:
+            updates[n.message, n.repeat_count].append(existing[key])
+        else:
+            fresh.append(n)
+    for (message, repeats), ids in updates.items():
+        Notification.objects.filter(id__in=ids).update(
+            message=message, repeat_count=F('repeat_count') + repeats, repeated_at=now, is_popped=False)
+
+    return fresh, {key[0] for key in keyed if key in existing}
+
+
+# ---------------------------
+# Writing
+# ---------------------------
+def save_notifications(notifications):
+    """
+    bulk_create new notifications, after coalescing, and apply the
+    counter changes their post_save signal would have made (bulk_create
+    does not send it). Returns how many rows were created.
+    """
+    notifications, repeated = coalesce(notifications)
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for n in notifications:
+        deltas[n.user_id]['unread_notifications'] += int(n.is_read is not True)
+        deltas[n.user_id]['inbox_version'] = 1
+    for user_id in repeated:
+        deltas[user_id]['inbox_version'] = 1   # a folded row pops up again
+    bump_counters(deltas)
+    return len(notifications)
+
+
+# ---------------------------
+# Fan-out
+# ---------------------------
+def _user_ids(users):
+    if isinstance(users, QuerySet):
+        return users.order_by().values_list('id', flat=True).iterator(chunk_size=settings.NOTIFICATION_FANOUT_CHUNK)
+    return (getattr(u, 'pk', u) for u in users)
+
+
+def notify_many(users, message, category=Notification.CATEGORY_SYSTEM, related_id=None, send_email=False):
+    """
+    Send one notification to each of `users` (users, ids or a User
+    queryset), skipping anyone who turned in-app notifications off.
+    Writes in chunks of NOTIFICATION_FANOUT_CHUNK, one transaction each,
+    so the query count grows with the chunks, not the users.
+    Returns how many notifications were created (repeats folded into an
+    unread one are not counted).
+    """
+    # Opting out is rare: load that set once instead of filtering by a huge id list
+    opted_out = set(UserProfile.objects.filter(notify_in_app=False).values_list('user_id', flat=True))
+    chunk_size = settings.NOTIFICATION_FANOUT_CHUNK
+
+    created, chunk, seen = 0, [], set()
+    for user_id in _user_ids(users):
+        if user_id in opted_out or user_id in seen:
+            continue
+        seen.add(user_id)
+        chunk.append(Notification(user_id=user_id, message=message, category=category,
+                                  related_id=related_id, send_email=send_email))
+        if len(chunk) == chunk_size:
+            with transaction.atomic():
+                created += save_notifications(chunk)
+            chunk = []
+    if chunk:
+        with transaction.atomic():
+            created += save_notifications(chunk)
+    return created
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboxEmail
+from .reminders import supports_update_returning
+
+# How long a worker may hold a batch before another worker may retry it
+LEASE = timedelta(minutes=5)
+
+
+# ---------------------------
+# Queueing
+# ---------------------------
+def make_email(subject, body, to, from_email=None):
+    """
+    Build an (unsaved) outbox row; pass a list of them to queue_emails.
+    """
+    return OutboxEmail(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        to=list(to),
+    )
+
+
+def queue_emails(emails):
+    """
+    Write outbox rows in one INSERT. Call this inside the transaction
+    that caused the emails, so they are queued if and only if it commits.
+    """
+    return OutboxEmail.objects.bulk_create(emails, batch_size=500)
+
+
+# ---------------------------
+# Delivery
+# ---------------------------
+def retry_delay(attempts):
+    """
+    Exponential backoff: EMAIL_OUTBOX_RETRY_DELAY, then doubling, capped at a day.
+    """
+    return timedelta(seconds=min(settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), 86400))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due emails, longest-waiting first, to this
+    worker and return them. The lease is a conditional UPDATE, so two
+    workers never get the same email, even on SQLite, which has no
+    SELECT ... FOR UPDATE.
+    """
+    now = timezone.now()
+    until = now + LEASE
+    due = (OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now)
+           .order_by('next_attempt_at'))
+
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        field = OutboxEmail._meta.get_field('next_attempt_at')
+        subquery, params = due.values('id')[:batch_size].query.sql_with_params()
+        # Repeat the due check outside the subquery: a row leased by
+        # another worker in the meantime no longer matches it
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(OutboxEmail._meta.db_table)} SET {qn(field.column)} = %s "
+                f"WHERE {qn('status')} = %s AND {qn(field.column)} <= %s AND id IN ({subquery}) RETURNING id",
+                [field.get_db_prep_value(until, connection), OutboxEmail.STATUS_PENDING,
+                 field.get_db_prep_value(now, connection), *params],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return list(OutboxEmail.objects.filter(id__in=ids).order_by('id'))
+
+    with transaction.atomic():
+        batch = list(due.select_for_update(skip_locked=True)[:batch_size])
+        OutboxEmail.objects.filter(id__in=[e.pk for e in batch]).update(next_attempt_at=until)
+    return batch
+
+
+def send_batch(batch, connection=None):
+    """
+    Send a leased batch over a single SMTP connection and record the outcome
+    of every email. Returns (sent, failed).
+    """
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    sent, failed = [], []
+
+    try:
+        connection.open()
+    except Exception as e:
+        failed = [(email, e) for email in batch]
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.to,
+                                       connection=connection)
+                try:
+                    message.send()
+                    sent.append(email)
+                except Exception as e:
+                    failed.append((email, e))
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutboxEmail.objects.filter(id__in=[e.pk for e in sent]).update(
+        status=OutboxEmail.STATUS_SENT, sent_at=now, attempts=F('attempts') + 1, last_error='')
+
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = str(error)[:1000]
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboxEmail.STATUS_FAILED
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+    OutboxEmail.objects.bulk_update([e for e, _ in failed], ['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+    return len(sent), len(failed)
+
+
+def drain_outbox(batch_size=100, connection=None):
+    """
+    Send every email that is due, batch by batch. Returns (sent, failed).
+    """
+    total_sent = total_failed = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return total_sent, total_failed
+        sent, failed = send_batch(batch, connection)
+        total_sent += sent
+        total_failed += failed
@@ -0,0 +1,209 @@
+import base64
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+# ---------------------------
+# Cursor Tokens
+# ---------------------------
+def encode_cursor(direction, values):
+    """
+    Opaque, URL-safe token for a position in the list.
+    Dates keep their microseconds, so ties on the sort key stay exact.
+    """
+    values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+    raw = json.dumps([direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Return (direction, values), or None for a missing or malformed token.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+# ---------------------------
+# Cursor Page
+# ---------------------------
+class CursorPage:
+    """
+    One page of results with links to its neighbours.
+    Iterates like a list; next_query / previous_query are ready-made
+    query strings that keep the current filters.
+    """
+
+    def __init__(self, paginator, object_list, next_cursor, previous_cursor, params):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, cursor):
+        params = self._params.copy()
+        params[self.paginator.cursor_param] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor) if self.previous_cursor else ''
+
+    @property
+    def total(self):
+        """
+        Cached estimate of the number of results, or None if not enabled.
+        """
+        return self.paginator.count
+
+
+# ---------------------------
+# Cursor Paginator
+# ---------------------------
+class CursorPaginator:
+    """
+    Keyset pagination over `ordering`, e.g. ('-created_at', '-id').
+    Each page is one indexed range query, however deep it is; no OFFSET
+    and no COUNT. The last ordering field must be unique.
+
+    With count_timeout set, `count` gives a total that is cached for
+    that many seconds instead of counted on every request. A total that is
+    already known (e.g. from a rollup table) can be passed as `count`.
+    """
+    cursor_param = 'cursor'
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), count_timeout=None, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.count_timeout = count_timeout
+        self._count = count
+
+    @property
+    def fields(self):
+        return [o.lstrip('-') for o in self.ordering]
+
+    def _position_q(self, values, forward):
+        """
+        Rows strictly after `values` in list order (or before, if not forward).
+        (a, b) after (x, y) means a > x OR (a = x AND b > y), per field direction.
+        """
+        q = Q()
+        for i, order in enumerate(self.ordering):
+            field = order.lstrip('-')
+            descending = order.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for prior, value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prior: value})
+            q |= step
+        return q
+
+    def _values(self, obj):
+        if isinstance(obj, dict):   # a values() queryset
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _parse(self, values):
+        """
+        Turn token values back into Python values; annotations
+        (e.g. a search rank) are plain JSON numbers and pass through.
+        """
+        opts = self.queryset.model._meta
+        parsed = []
+        for field, value in zip(self.fields, values):
+            try:
+                parsed.append(opts.get_field(field).to_python(value))
+            except FieldDoesNotExist:
+                parsed.append(value)
+        return parsed
+
+    def get_page(self, request):
+        """
+        Page for the cursor in request.GET (first page if absent or invalid).
+        """
+        params = request.GET.copy()
+        cursor = decode_cursor(params.pop(self.cursor_param, [None])[-1])
+
+        direction, values = cursor if cursor else ('next', None)
+        if values is not None:
+            try:
+                values = self._parse(values)
+            except Exception:
+                direction, values = 'next', None
+            if values is not None and len(values) != len(self.ordering):
+                direction, values = 'next', None
+
+        forward = direction == 'next'
+        qs = self.queryset
+        if values is not None:
+            qs = qs.filter(self._position_q(values, forward))
+        if forward:
+            qs = qs.order_by(*self.ordering)
+        else:
+            qs = qs.order_by(*[o[1:] if o.startswith('-') else f'-{o}' for o in self.ordering])
+
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        # Paging forward there is something behind us if we came from a cursor;
+        # paging back there is always something ahead
+        has_next, has_previous = (has_more, values is not None) if forward else (True, has_more)
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor('next', self._values(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor('prev', self._values(rows[0]))
+
+        return CursorPage(self, rows, next_cursor, previous_cursor, params)
+
+    @property
+    def count(self):
+        if self._count is not None or self.count_timeout is None:
+            return self._count
+        if self._count is None:
+            sql, query_params = self.queryset.order_by().query.sql_with_params()
+            digest = hashlib.md5(f'{sql}|{query_params}'.encode()).hexdigest()
+            cache = caches[settings.PAGINATION_COUNT_CACHE]
+            key = f'page-count:{digest}'
+            self._count = cache.get(key)
+            if self._count is None:
+                self._count = self.queryset.order_by().count()
+                cache.set(key, self._count, self.count_timeout)
+        return self._count
@@ -0,0 +1,201 @@
+"""
+EXPLAIN checks for the hot lookups behind the views, the inbox poll, the
+reminder scheduler and the outbox/digest workers. Run by the test suite
+(core.tests.QueryPlanTests) and by `python manage.py check_query_plans`.
+"""
+import random
+import re
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from .access import grant_assignees, set_owners
+from .models import (Task, Reminder, ReminderTrigger, Complaint, Notification, ArchivedNotification,
+                     Comment, OutboxEmail, SyncTombstone)
+from .inbox import unread_q, read_q
+from .retention import prunable
+from .reminders import audience_q
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)\S+$')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\S+)')
+
+SUPPORTED_VENDORS = ("sqlite", "postgresql")
+
+
+# ---------------------------
+# Plan Check
+# ---------------------------
+def check_query_plans(rows=2000):
+    """
+    Seed `rows` of data in a transaction that is always rolled back and
+    EXPLAIN every hot query. Returns (name, plan lines, tables scanned in
+    full) for each query; a query is fine when the last item is empty.
+    """
+    results = []
+    with transaction.atomic():
+        user, task, complaint = seed(rows)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            if connection.vendor == "postgresql":
+                # Sequential scans then only show up where no index can serve the query
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for name, qs in hot_queries(user, task, complaint):
+            plan = explain(qs)
+            results.append((name, plan, full_scans(plan)))
+        transaction.set_rollback(True)
+    return results
+
+
+# ---------------------------
+# Seed Data
+# ---------------------------
+def seed(rows):
+    """
+    Bulk-insert a realistic spread of rows. Returns one user, task and
+    complaint to parameterise the queries with.
+    """
+    rng = random.Random(7)
+    now = timezone.now()
+    users = User.objects.bulk_create([User(username=f"plan_user_{i}") for i in range(50)])
+
+    tasks = Task.objects.bulk_create([
+        Task(title=f"Task {i}", user=rng.choice(users), is_completed=rng.random() < 0.4)
+        for i in range(rows)
+    ], batch_size=1000)
+    through = Task.assigned_to.through
+    pairs = {(t.pk, u.pk) for t in tasks for u in rng.sample(users, 2)}
+    through.objects.bulk_create([through(task_id=t, user_id=u) for t, u in pairs], batch_size=1000)
+    set_owners({t.pk: t.user_id for t in tasks})
+    grant_assignees(pairs)
+
+    reminders = Reminder.objects.bulk_create([
+        Reminder(task=rng.choice(tasks), title="r", created_by=rng.choice(users),
+                 reminder_time=now + timedelta(hours=rng.randint(-500, 500)),
+                 is_triggered=rng.random() < 0.5)
+        for _ in range(rows)
+    ], batch_size=1000)
+    ReminderTrigger.objects.bulk_create([
+        ReminderTrigger(reminder=r, user=rng.choice(users), triggered=rng.random() < 0.8)
+        for r in reminders
+    ], batch_size=1000, ignore_conflicts=True)
+
+    complaints = Complaint.objects.bulk_create([
+        Complaint(user=rng.choice(users), subject="c", message="m",
+                  status=rng.choice(["Pending", "In Progress", "Resolved"]))
+        for _ in range(rows)
+    ], batch_size=1000)
+
+    categories = [c for c, _ in Notification.CATEGORY_CHOICES]
+    Notification.objects.bulk_create([
+        Notification(user=rng.choice(users), message="n", is_read=True if rng.random() < 0.2 else None,
+                     is_popped=rng.random() < 0.8, send_email=rng.random() < 0.3,
+                     category=rng.choice(categories), related_id=rng.choice([None, rng.randint(1, rows)]))
+        for _ in range(rows * 5)
+    ], batch_size=1000)
+    ArchivedNotification.objects.bulk_create([
+        ArchivedNotification(id=10 ** 9 + i, user=rng.choice(users), message="n",
+                             category=rng.choice(categories), created_at=timezone.now())
+        for i in range(rows * 2)
+    ], batch_size=1000)
+
+    Comment.objects.bulk_create([
+        Comment(user=rng.choice(users), content="c",
+                **({"task": rng.choice(tasks)} if rng.random() < 0.5 else {"complaint": rng.choice(complaints)}))
+        for _ in range(rows)
+    ], batch_size=1000)
+
+    OutboxEmail.objects.bulk_create([
+        OutboxEmail(subject="s", body="b", to=["x@example.com"],
+                    status=rng.choice([OutboxEmail.STATUS_PENDING, OutboxEmail.STATUS_SENT]))
+        for _ in range(rows // 4)
+    ], batch_size=1000)
+
+    return users[0], tasks[0], complaints[0]
+
+# ---------------------------
+# Hot Queries
+# ---------------------------
+def hot_queries(user, task, complaint):
+    """
+    (name, queryset) for each query, in the shape the code runs it.
+    """
+    now = timezone.now()
+    page = 11  # CursorPaginator fetches per_page + 1
+    assigned = Task.objects.assigned_ids(user)
+    watermark = now - timedelta(days=1)
+
+    return [
+        # core.views
+        ("task_list", Task.objects.visible_to(user).order_by("-created_at", "-id")[:page]),
+        ("task_list (created by me)",
+         Task.objects.visible_to(user).filter(user=user).order_by("-created_at", "-id")[:page]),
+        ("task_list (assigned to me)",
+         Task.objects.visible_to(user).filter(id__in=assigned).order_by("-created_at", "-id")[:page]),
+        ("task_detail comments", Comment.objects.filter(task=task, parent__isnull=True)),
+        ("complaint_list", Complaint.objects.order_by("-created_at", "-id")[:page]),
+        ("complaint_list (by status)",
+         Complaint.objects.filter(status="Pending").order_by("-created_at", "-id")[:page]),
+        ("complaint_detail comments", Comment.objects.filter(complaint=complaint, parent__isnull=True)),
+        ("reminder_list", Reminder.objects.filter(
+            Q(task_id__in=assigned) | Q(created_by=user)).order_by("-reminder_time", "-id")[:page]),
+        ("notification_list", Notification.objects.filter(user=user).order_by("-created_at", "-id")[:page]),
+        ("notification_list (unread)",
+         Notification.objects.filter(user=user).filter(unread_q(watermark)).order_by("-created_at", "-id")[:page]),
+        ("notification_list (read)",
+         Notification.objects.filter(user=user).filter(read_q(watermark)).order_by("-created_at", "-id")[:page]),
+        ("mark_all_notifications_read", Notification.objects.filter(user=user, is_read=False)),
+        ("history_log complaints", Complaint.objects.filter(user=user).order_by("-created_at")),
+        ("history_log reminders", Reminder.objects.filter(created_by=user).order_by("-reminder_time")),
+        # core.stats (dashboard)
+        ("dashboard complaint counts", Complaint.objects.order_by().values_list("status").annotate(n=Count("id"))),
+        ("dashboard upcoming reminders", Reminder.objects.filter(
+            task_id__in=assigned, reminder_time__range=(now, now + timedelta(days=7)))),
+        # core.inbox (polling / stream)
+        ("popup notification", Notification.objects.filter(
+            user=user, is_popped=False).filter(unread_q(watermark)).order_by("-created_at")[:1]),
+        ("next reminder due", Reminder.objects.filter(is_triggered=False).filter(audience_q(user))),
+        ("pending reminder triggers", ReminderTrigger.objects.filter(user=user, triggered=False)),
+        # core.reminders / run_reminder_scheduler
+        ("due reminders", Reminder.objects.filter(reminder_time__lte=now, is_triggered=False)),
+        ("due reminders (one user)",
+         Reminder.objects.filter(reminder_time__lte=now, is_triggered=False).filter(audience_q(user))),
+        ("scheduler sync", Reminder.objects.filter(updated_at__gte=now - timedelta(seconds=35))),
+        # core.outbox / core.digests
+        ("outbox batch", OutboxEmail.objects.filter(
+            status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now).order_by("next_attempt_at")[:100]),
+        # core.notifications (coalescing repeats)
+        ("coalesce notifications", Notification.objects.filter(
+            user_id__in=[user.id], category__in=[Notification.CATEGORY_REMINDER], related_id__in=[1, 2],
+            emailed_at__isnull=True).filter(Q(created_at__gte=now) | Q(repeated_at__gte=now))),
+        # core.retention / prune_notifications
+        ("prune notifications", prunable(Notification.CATEGORY_SYSTEM, now - timedelta(days=60))
+         .order_by("created_at", "id")[:1000]),
+        ("notification_list (archive)",
+         ArchivedNotification.objects.filter(user=user).order_by("-created_at", "-id")[:page]),
+        ("digest recipients", Notification.objects.filter(
+            send_email=True, emailed_at__isnull=True).order_by().values_list("user_id").distinct()),
+        # core.sync (/api/sync/)
+        ("sync tasks", Task.objects.visible_to(user).filter(
+            updated_at__gt=now - timedelta(hours=1)).order_by("updated_at", "id")[:501]),
+        ("sync complaints", Complaint.objects.filter(
+            user=user, updated_at__gt=now - timedelta(hours=1)).order_by("updated_at", "id")[:501]),
+        ("sync tombstones", SyncTombstone.objects.filter(
+            user=user, kind=SyncTombstone.KIND_TASK, id__gt=0).order_by("id")[:501]),
+    ]
+
+# ---------------------------
+# EXPLAIN
+# ---------------------------
+def explain(qs):
+    sql, params = qs.query.sql_with_params()
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+def full_scans(plan):
+    if connection.vendor == "sqlite":
+        return [line.split()[1] for line in plan if SQLITE_FULL_SCAN.match(line)]
+    return [m.group(1) for line in plan for m in POSTGRES_FULL_SCAN.finditer(line)]
@@ -0,0 +1,154 @@
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Reminder, ReminderTrigger, Notification, TaskAccess
+from .notifications import save_notifications
+
+
+# ---------------------------
+# Audience
+# ---------------------------
+def audience_q(user, prefix=''):
+    """
+    Reminders the user receives: on tasks they own or are assigned to,
+    or that they created themselves.
+    """
+    task_ids = TaskAccess.objects.filter(user=user).values('task_id')
+    return Q(**{f'{prefix}task_id__in': task_ids}) | Q(**{f'{prefix}created_by': user})
+
+
+def reminder_audiences(reminders):
+    """
+    Map each reminder id to its recipients (everyone with access to the
+    task plus the reminder's creator), in one query.
+    """
+    access = defaultdict(set)
+    rows = TaskAccess.objects.filter(
+        task_id__in={r.task_id for r in reminders}
+    ).values_list('task_id', 'user_id')
+    for task_id, user_id in rows:
+        access[task_id].add(user_id)
+
+    audiences = {}
+    for r in reminders:
+        audiences[r.pk] = set(access[r.task_id])
+        if r.created_by_id:
+            audiences[r.pk].add(r.created_by_id)
+    return audiences
+
+
+# ---------------------------
+# Claiming
+# ---------------------------
+def supports_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    # SQLite added RETURNING in 3.35, alongside INSERT ... RETURNING
+    return connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+
+
+def _claim(candidates, flag, returning='id'):
+    """
+    Atomically flip `flag` from False to True on the rows in `candidates`
+    and return the `returning` column of the rows this call flipped.
+    Concurrent callers (several tabs, workers or the scheduler) never
+    claim the same row twice.
+    """
+    model = candidates.model
+    candidates = candidates.filter(**{flag: False}).order_by()
+
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        column = model._meta.get_field(returning).column
+        subquery, params = candidates.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(model._meta.db_table)} SET {qn(flag)} = %s "
+                f"WHERE {qn(flag)} = %s AND id IN ({subquery}) RETURNING {qn(column)}",
+                [True, False, *params],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    with transaction.atomic():
+        rows = list(
+            candidates.select_for_update(skip_locked=True, of=('self',)).values_list('id', returning)
+        )
+        model.objects.filter(id__in=[pk for pk, _ in rows]).update(**{flag: True})
+    return [value for _, value in rows]
+
+
+def claim_reminders(candidates):
+    """
+    Mark the untriggered reminders in `candidates` as triggered
+    and return the ids this call claimed.
+    """
+    return _claim(candidates, 'is_triggered')
+
+
+def claim_due_reminders(user=None, now=None):
+    """
+    Claim every reminder that is due, or only those the user receives.
+    """
+    candidates = Reminder.objects.filter(reminder_time__lte=now or timezone.now())
+    if user is not None:
+        candidates = candidates.filter(audience_q(user))
+    return claim_reminders(candidates)
+
+
+def claim_pending_triggers(user):
+    """
+    Mark the user's undelivered reminder triggers as delivered
+    and return the reminder ids they point at.
+    """
+    return _claim(ReminderTrigger.objects.filter(user=user), 'triggered', returning='reminder')
+
+
+# ---------------------------
+# Dispatching
+# ---------------------------
+def dispatch_reminders(reminder_ids):
+    """
+    Fan already-claimed reminders out to every recipient: one
+    ReminderTrigger and one in-app notification each, written with
+    bulk_create. Notifications are flagged send_email and go out in the
+    recipient's next digest (see send_notification_digests).
+    The query count does not depend on the number of recipients.
+    Returns the reminders, with their task loaded.
+    """
+    if not reminder_ids:
+        return []
+
+    with transaction.atomic():
+        reminders = list(Reminder.objects.filter(id__in=reminder_ids).select_related('task'))
+        audiences = reminder_audiences(reminders)
+
+        triggers, notifications = [], []
+        for r in reminders:
+            for uid in audiences[r.pk]:
+                triggers.append(ReminderTrigger(reminder=r, user_id=uid))
+                notifications.append(Notification(
+                    user_id=uid,
+                    message=f"Reminder: '{r.task.title}' is due now!",
+                    category=Notification.CATEGORY_REMINDER,
+                    related_id=r.pk,
+                    send_email=True,
+                ))
+        # A re-armed reminder fires again: reset the triggers left from last time
+        ReminderTrigger.objects.bulk_create(
+            triggers, update_conflicts=True, unique_fields=['reminder', 'user'],
+            update_fields=['triggered', 'created_at'], batch_size=1000)
+        save_notifications(notifications)
+
+    return reminders
+
+
+def fire_reminders(reminder_ids):
+    """
+    Claim and deliver a batch of reminders by id.
+    Reminders already triggered elsewhere are skipped. Claim and dispatch
+    share a transaction: if dispatching fails, the claim is rolled back
+    and the reminders fire on the next attempt.
+    """
+    with transaction.atomic():
+        return dispatch_reminders(claim_reminders(Reminder.objects.filter(id__in=reminder_ids)))
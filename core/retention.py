@@ -0,0 +1,76 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Notification, ArchivedNotification
+from .stats import bump_counters
+from .inbox import read_q_joined
+from .muting import muted
+
+ARCHIVE_COLUMNS = ('id', 'user_id', 'message', 'category', 'related_id', 'repeat_count', 'created_at')
+
+
+# ---------------------------
+# Retention Policy
+# ---------------------------
+def retention_cutoffs(now=None):
+    """
+    {category: oldest created_at to keep}, for categories with a retention.
+    """
+    now = now or timezone.now()
+    return {category: now - timedelta(days=days)
+            for category, days in settings.NOTIFICATION_RETENTION_DAYS.items() if days}
+
+
+def prunable(category, cutoff):
+    """
+    Read notifications of the category created before `cutoff`, except
+    those still waiting for an email digest.
+    """
+    return (Notification.objects
+            .filter(category=category, created_at__lt=cutoff)
+            .filter(read_q_joined())
+            .exclude(send_email=True, emailed_at__isnull=True))
+
+
+# ---------------------------
+# Pruning
+# ---------------------------
+def prune_notifications(archive=None, categories=None, chunk_size=None, now=None):
+    """
+    Archive (or delete) prunable notifications one chunk per transaction,
+    oldest first, so no lock is held for long. Yields (category, rows)
+    after each committed chunk.
+    """
+    archive = settings.NOTIFICATION_ARCHIVE if archive is None else archive
+    chunk_size = chunk_size or settings.NOTIFICATION_PRUNE_CHUNK
+    # Lock only the notifications, not the joined counter rows
+    lock = {'of': ('self',)} if connection.features.has_select_for_update_of else {}
+
+    for category, cutoff in retention_cutoffs(now).items():
+        if categories and category not in categories:
+            continue
+        position = Q()
+        while True:
+            with transaction.atomic():
+                rows = list(prunable(category, cutoff).filter(position)
+                            .select_for_update(**lock)
+                            .order_by('created_at', 'id')
+                            .values(*ARCHIVE_COLUMNS)[:chunk_size])
+                if not rows:
+                    break
+                if archive:
+                    ArchivedNotification.objects.bulk_create(
+                        [ArchivedNotification(**row) for row in rows], ignore_conflicts=True)
+                # Pruned rows are read, so the per-row unread bookkeeping has nothing to do
+                with muted('notifications'):
+                    Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                bump_counters({row['user_id']: {'inbox_version': 1} for row in rows})
+
+            yield category, len(rows)
+            if len(rows) < chunk_size:
+                break
+            last = rows[-1]
+            position = (Q(created_at__gt=last['created_at'])
+                        | Q(created_at=last['created_at'], id__gt=last['id']))
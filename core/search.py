@@ -0,0 +1,219 @@
+import re
+from collections import defaultdict
+from django.db import connection
+from django.db.models import BooleanField, Expression, F, FloatField, Q
+from .models import Task, TaskAccess, Complaint
+
+# Column weights for title, body and people: bm25() on SQLite, and the
+# matching {D, C, B, A} array for ts_rank() on PostgreSQL
+WEIGHTS = (10.0, 4.0, 1.0)
+PG_WEIGHTS = '{0.0, 0.1, 0.4, 1.0}'
+
+
+# ---------------------------
+# Indexed Documents
+# ---------------------------
+def task_documents(ids):
+    """
+    (id, title, body, people) for each task: owner and assignee usernames
+    go in `people`. Two queries however many tasks.
+    """
+    people = defaultdict(list)
+    for task_id, username in Task.assigned_to.through.objects.filter(
+            task_id__in=ids).values_list('task_id', 'user__username'):
+        people[task_id].append(username)
+
+    return [
+        (pk, title, description, ' '.join([owner, *people[pk]]))
+        for pk, title, description, owner in Task.objects.filter(id__in=ids).values_list(
+            'id', 'title', 'description', 'user__username')
+    ]
+
+
+def complaint_documents(ids):
+    return list(Complaint.objects.filter(id__in=ids).values_list('id', 'subject', 'message', 'user__username'))
+
+
+INDEXES = {
+    Task: ('core_task_search', task_documents),
+    Complaint: ('core_complaint_search', complaint_documents),
+}
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+def search_backend():
+    """
+    'sqlite' (FTS5), 'postgresql' (tsvector + GIN), or None if unsupported.
+    """
+    return connection.vendor if connection.vendor in ('sqlite', 'postgresql') else None
+
+
+# ---------------------------
+# Indexing
+# ---------------------------
+def _delete_entries(cursor, model, ids):
+    table, _ = INDEXES[model]
+    key = 'rowid' if connection.vendor == 'sqlite' else 'object_id'
+    cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(ids))})", ids)
+
+
+def index_objects(model, ids):
+    """
+    (Re)write the index entries of the given objects; ids that no longer
+    exist are removed.
+    """
+    ids = list(ids)
+    if not ids or not search_backend():
+        return
+
+    table, documents = INDEXES[model]
+    rows = documents(ids)
+    with connection.cursor() as cursor:
+        _delete_entries(cursor, model, ids)
+        if not rows:
+            return
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, object_id, title, body, people) VALUES (%s, %s, %s, %s, %s)",
+                [(row[0], *row) for row in rows],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} (object_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('simple', %s), 'A') || "
+                f"setweight(to_tsvector('simple', %s), 'B') || "
+                f"setweight(to_tsvector('simple', %s), 'C'))",
+                rows,
+            )
+
+
+def remove_objects(model, ids):
+    ids = list(ids)
+    if not ids or not search_backend():
+        return
+    with connection.cursor() as cursor:
+        _delete_entries(cursor, model, ids)
+
+
+def rebuild_index(model, chunk_size=5000):
+    """
+    Re-index every object of `model`. Returns how many were indexed.
+    """
+    if not search_backend():
+        return 0
+
+    table, _ = INDEXES[model]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+
+    total = 0
+    ids = model.objects.order_by('id').values_list('id', flat=True)
+    last = 0
+    while True:
+        chunk = list(ids.filter(id__gt=last)[:chunk_size])
+        if not chunk:
+            return total
+        index_objects(model, chunk)
+        total += len(chunk)
+        last = chunk[-1]
+
+
+# ---------------------------
+# Querying
+# ---------------------------
+def search_terms(text):
+    """
+    Words of a user query; punctuation and FTS operators are dropped.
+    """
+    return re.findall(r'[^\W_]+', text.lower())
+
+
+def match_query(terms):
+    """
+    Every term must match, each as a word prefix.
+    """
+    if connection.vendor == 'sqlite':
+        return ' '.join(f'"{t}"*' for t in terms)
+    return ' & '.join(f'{t}:*' for t in terms)
+
+
+class _IndexExpression(Expression):
+    """
+    SQL over the joined index row of the queryset's model. The join is
+    made by resolving `search_entry`, so the index drives the query
+    (one MATCH per query, not one per row).
+    """
+
+    def __init__(self, query, output_field=None):
+        super().__init__(output_field=output_field)
+        self.query = query
+        self.entry = F('search_entry__pk')
+
+    def get_source_expressions(self):
+        return [self.entry]
+
+    def set_source_expressions(self, exprs):
+        (self.entry,) = exprs
+
+    def alias(self, compiler):
+        return compiler.quote_name_unless_alias(self.entry.alias)
+
+
+class SearchMatch(_IndexExpression):
+    output_field = BooleanField()
+
+    def as_sqlite(self, compiler, connection):
+        # FTS5 exposes the whole row as a hidden column named after the table
+        table = connection.ops.quote_name(self.entry.target.model._meta.db_table)
+        return f"{self.alias(compiler)}.{table} MATCH %s", [self.query]
+
+    def as_postgresql(self, compiler, connection):
+        return f"{self.alias(compiler)}.document @@ to_tsquery('simple', %s)", [self.query]
+
+
+class SearchRank(_IndexExpression):
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection):
+        # bm25() is lower-is-better; negate it so both backends sort descending
+        weights = ', '.join(str(w) for w in WEIGHTS)
+        return f"-bm25({self.alias(compiler)}, {weights})", []
+
+    def as_postgresql(self, compiler, connection):
+        return (f"ts_rank('{PG_WEIGHTS}', {self.alias(compiler)}.document, to_tsquery('simple', %s))",
+                [self.query])
+
+
+def _icontains_q(model, text):
+    """
+    The search before the index existed: `text` anywhere in the fields
+    the index covers.
+    """
+    if model is Task:
+        assignees = TaskAccess.objects.filter(role=TaskAccess.ROLE_ASSIGNEE, user__username__icontains=text)
+        return (Q(title__icontains=text) | Q(description__icontains=text)
+                | Q(user__username__icontains=text) | Q(id__in=assignees.values('task_id')))
+    return Q(subject__icontains=text) | Q(message__icontains=text) | Q(user__username__icontains=text)
+
+
+def search(queryset, text):
+    """
+    Narrow `queryset` to objects matching every word of `text` (as a prefix)
+    and annotate `search_rank` (higher is better).
+    Falls back to the icontains search on every indexed field when there
+    is no index.
+    """
+    model = queryset.model
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    if search_backend() is None:
+        return queryset.filter(_icontains_q(model, text))
+
+    # The isnull filter makes the join an INNER one, which MATCH needs
+    query = match_query(terms)
+    return (queryset.filter(search_entry__isnull=False).filter(SearchMatch(query))
+            .annotate(search_rank=SearchRank(query)))
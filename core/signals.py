@@ -1,41 +1,409 @@
-from django.db.models.signals import post_save
+from collections import defaultdict
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Reminder, Notification
+from django.contrib.auth.models import User
+from .models import (Reminder, Notification, Task, TaskAccess, Complaint, ComplaintStatusChange, SyncTombstone)
+from .stats import (bump_counters, count_assignments, bump_complaint_rollups, rollup_keys,
+                    resolution_entry, bump_resolution_sketches)
+from .reminders import fire_reminders, reminder_audiences
+from .search import index_objects, remove_objects
+from .access import set_owners, grant_assignees, revoke_assignees
+from .muting import is_muted
+from .sync import record_gone, record_deleted_tasks, complaint_audience
+from .inbox import read_watermark, read_state, is_read
 
 @receiver(post_save, sender=Reminder)
 def create_notification_and_email(sender, instance, created, **kwargs):
     """
     Create an in-app notification and send email for reminders.
-    If the reminder is due now or in the past, it triggers immediately.
-    """
-    if created or not instance.is_triggered:
-        now = timezone.now()
-
-        # Only trigger if reminder time has arrived
-        if instance.reminder_time <= now:
-            # Create in-app notification
-            Notification.objects.create(
-                user=instance.task.user,
-                message=f"Reminder: '{instance.task.title}' is due now!",
-                category='reminder'
-            )
-
-            # Send email if user has email notifications enabled
-            user_profile = getattr(instance.task.user, 'userprofile', None)
-            if user_profile and getattr(user_profile, 'reminder_email', True):
-                send_mail(
-                    subject=f"Reminder: {instance.task.title}",
-                    message=f"Hello {instance.task.user.userprofile.full_name},\n\n"
-                            f"This is a reminder that your task '{instance.task.title}' "
-                            f"is due now.\n\nRegards,\nYour Team",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[instance.task.user.email],
-                    fail_silently=False
-                )
-
-            # Mark reminder as triggered
-            instance.is_triggered = True
-            instance.save()
+    If the reminder is due now or in the past, it triggers immediately,
+    unless the reminder scheduler (run_reminder_scheduler) takes care of it.
+    """
+    if settings.REMINDER_SCHEDULER_ENABLED or instance.is_triggered:
+        return
+
+    # Only trigger if reminder time has arrived
+    if instance.reminder_time <= timezone.now():
+        fire_reminders([instance.pk])
+        instance.is_triggered = True
+
+
+# ---------------------------
+# User Counters
+# ---------------------------
+def _stash_old_values(instance, *fields):
+    """
+    Remember the stored values of `fields` so post_save can tell what changed.
+    """
+    old = None
+    if instance.pk:
+        old = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+    for i, field in enumerate(fields):
+        setattr(instance, f'_old_{field}', old[i] if old else None)
+
+
+@receiver(pre_save, sender=Task)
+def stash_task_state(sender, instance, **kwargs):
+    _stash_old_values(instance, 'is_completed', 'user_id')
+
+
+@receiver(post_save, sender=Task)
+def count_task_save(sender, instance, created, **kwargs):
+    done = int(instance.is_completed)
+
+    if created:
+        bump_counters({instance.user_id: {'total_tasks': 1, 'created_tasks': 1, 'completed_tasks': done}})
+        return
+
+    old_owner = getattr(instance, '_old_user_id', None)
+    old_done = getattr(instance, '_old_is_completed', None)
+    if old_owner is None or (old_owner, old_done) == (instance.user_id, instance.is_completed):
+        return
+
+    # Take the task away as it was and add it back as it is now; an owner
+    # who is also an assignee keeps seeing it, so their totals cancel out
+    assignees = set(instance.assigned_to.values_list('id', flat=True))
+    deltas = defaultdict(lambda: defaultdict(int))
+    for owner, done, sign in ((old_owner, old_done, -1), (instance.user_id, instance.is_completed, 1)):
+        deltas[owner]['created_tasks'] += sign
+        for uid in assignees | {owner}:
+            deltas[uid]['total_tasks'] += sign
+            deltas[uid]['completed_tasks'] += sign * int(done)
+    if old_owner != instance.user_id:
+        for uid in (old_owner, instance.user_id):
+            deltas[uid]['inbox_version'] = 1   # the task's reminders changed audience
+    bump_counters(deltas)
+
+
+@receiver(pre_delete, sender=Task)
+def count_task_delete(sender, instance, **kwargs):
+    if is_muted('tasks'):
+        return
+    done = int(instance.is_completed)
+    deltas = defaultdict(lambda: defaultdict(int))
+
+    creator = deltas[instance.user_id]
+    creator['created_tasks'] -= 1
+    creator['total_tasks'] -= 1
+    creator['completed_tasks'] -= done
+
+    for uid in instance.assigned_to.values_list('id', flat=True):
+        deltas[uid]['assigned_tasks'] -= 1
+        if uid != instance.user_id:
+            deltas[uid]['total_tasks'] -= 1
+            deltas[uid]['completed_tasks'] -= done
+
+    bump_counters(deltas)
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def count_task_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Works from both sides of the relation:
+    task.assigned_to.add(user) and user.assigned_tasks.add(task).
+    """
+    if action in ('pre_clear', 'pre_remove'):
+        # remove() reports the pks it was given, not the rows it deleted
+        if reverse:
+            current = sender.objects.filter(user=instance).values_list('task_id', flat=True)
+        else:
+            current = sender.objects.filter(task=instance).values_list('user_id', flat=True)
+        if action == 'pre_remove':
+            current = current.filter(**{'task_id__in' if reverse else 'user_id__in': pk_set})
+        instance._removed_pks = set(current)
+        return
+
+    if action in ('post_clear', 'post_remove'):
+        pk_set, sign = getattr(instance, '_removed_pks', set()), -1
+    elif action == 'post_add':
+        sign = 1
+    else:
+        return
+
+    if not pk_set:
+        return
+
+    if reverse:
+        pairs = [(task_id, instance.pk) for task_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+    count_assignments(pairs, sign)
+
+
+@receiver(pre_save, sender=Complaint)
+def stash_complaint_state(sender, instance, **kwargs):
+    _stash_old_values(instance, 'status', 'complaint_type', 'resolved_at')
+    # Stamp the moment a complaint becomes resolved; reopening clears it
+    if instance.status != 'Resolved':
+        instance.resolved_at = None
+    elif instance._old_status != 'Resolved' or instance.resolved_at is None:
+        instance.resolved_at = instance._old_resolved_at or timezone.now()
+
+
+@receiver(post_save, sender=Complaint)
+def count_complaint_save(sender, instance, created, **kwargs):
+    resolved = instance.status == 'Resolved'
+
+    if created:
+        bump_counters({instance.user_id: {'complaints': 1, 'resolved_complaints': int(resolved)}})
+        return
+
+    was_resolved = getattr(instance, '_old_status', None) == 'Resolved'
+    if resolved != was_resolved:
+        bump_counters({instance.user_id: {'resolved_complaints': 1 if resolved else -1}})
+
+
+@receiver(post_delete, sender=Complaint)
+def count_complaint_delete(sender, instance, **kwargs):
+    bump_counters({instance.user_id: {
+        'complaints': -1,
+        'resolved_complaints': -int(instance.status == 'Resolved'),
+    }})
+
+
+# ---------------------------
+# Complaint Rollups
+# ---------------------------
+@receiver(post_save, sender=Complaint)
+def roll_up_complaint_save(sender, instance, created, **kwargs):
+    if created:
+        bump_complaint_rollups({key: 1 for key in rollup_keys(instance.complaint_type, instance.status)})
+        return
+
+    old = (getattr(instance, '_old_complaint_type', None), getattr(instance, '_old_status', None))
+    if None in old or old == (instance.complaint_type, instance.status):
+        return
+    tag_ids = list(instance.tags.values_list('id', flat=True))
+    deltas = defaultdict(int)
+    for key in rollup_keys(*old, tag_ids):
+        deltas[key] -= 1
+    for key in rollup_keys(instance.complaint_type, instance.status, tag_ids):
+        deltas[key] += 1
+    bump_complaint_rollups(deltas)
+
+
+@receiver(pre_delete, sender=Complaint)
+def roll_up_complaint_delete(sender, instance, **kwargs):
+    # pre_delete: the tag rows are gone by post_delete
+    tag_ids = instance.tags.values_list('id', flat=True)
+    bump_complaint_rollups({key: -1 for key in rollup_keys(instance.complaint_type, instance.status, tag_ids)})
+
+
+@receiver(m2m_changed, sender=Complaint.tags.through)
+def roll_up_complaint_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Works from both sides: complaint.tags.add(tag) and tag.complaints.add(complaint).
+    """
+    if action in ('pre_clear', 'pre_remove'):
+        if reverse:
+            current = sender.objects.filter(tag=instance).values_list('complaint_id', flat=True)
+        else:
+            current = sender.objects.filter(complaint=instance).values_list('tag_id', flat=True)
+        if action == 'pre_remove':
+            current = current.filter(**{'complaint_id__in' if reverse else 'tag_id__in': pk_set})
+        instance._removed_rollup_pks = set(current)
+        return
+
+    if action in ('post_clear', 'post_remove'):
+        pk_set, sign = getattr(instance, '_removed_rollup_pks', set()), -1
+    elif action == 'post_add':
+        sign = 1
+    else:
+        return
+
+    if not pk_set:
+        return
+
+    deltas = defaultdict(int)
+    if reverse:
+        for complaint_type, status in Complaint.objects.filter(id__in=pk_set).values_list('complaint_type', 'status'):
+            deltas[(complaint_type, status, instance.pk)] += sign
+    else:
+        for tag_id in pk_set:
+            deltas[(instance.complaint_type, instance.status, tag_id)] += sign
+    bump_complaint_rollups(deltas)
+
+
+# ---------------------------
+# Complaint Resolution
+# ---------------------------
+@receiver(post_save, sender=Complaint)
+def record_status_change(sender, instance, created, **kwargs):
+    old_status = '' if created else getattr(instance, '_old_status', None)
+    if old_status is not None and old_status != instance.status:
+        ComplaintStatusChange.objects.create(complaint=instance, from_status=old_status, to_status=instance.status)
+
+
+@receiver(post_save, sender=Complaint)
+def sketch_resolution_save(sender, instance, created, **kwargs):
+    old_type = getattr(instance, '_old_complaint_type', None)
+    old_resolved_at = None if created else getattr(instance, '_old_resolved_at', None)
+    if (old_type, old_resolved_at) == (instance.complaint_type, instance.resolved_at):
+        return
+
+    added, removed = [], []
+    if old_resolved_at:
+        removed.append(resolution_entry(old_type, instance.created_at, old_resolved_at))
+    if instance.resolved_at:
+        added.append(resolution_entry(instance.complaint_type, instance.created_at, instance.resolved_at))
+    bump_resolution_sketches(added, removed)
+
+
+@receiver(pre_delete, sender=Complaint)
+def sketch_resolution_delete(sender, instance, **kwargs):
+    if instance.resolved_at:
+        bump_resolution_sketches(removed=[resolution_entry(instance.complaint_type, instance.created_at,
+                                                           instance.resolved_at)])
+
+
+@receiver(pre_save, sender=Notification)
+def stash_notification_state(sender, instance, **kwargs):
+    _stash_old_values(instance, 'is_read')
+
+
+@receiver(post_save, sender=Notification)
+def count_notification_save(sender, instance, created, **kwargs):
+    changes = {'inbox_version': 1}
+
+    if created:
+        # New notifications are above the watermark: unread unless marked read
+        changes['unread_notifications'] = int(instance.is_read is not True)
+    elif getattr(instance, '_old_is_read', None) != instance.is_read:
+        watermark = read_watermark(instance.user_id)
+        was_read = read_state(instance._old_is_read, instance.created_at, watermark)
+        now_read = is_read(instance, watermark)
+        if was_read != now_read:
+            changes['unread_notifications'] = -1 if now_read else 1
+
+    bump_counters({instance.user_id: changes})
+
+
+@receiver(post_delete, sender=Notification)
+def count_notification_delete(sender, instance, **kwargs):
+    if is_muted('notifications'):
+        return
+    bump_counters({instance.user_id: {
+        'unread_notifications': -int(not is_read(instance, read_watermark(instance.user_id))),
+        'inbox_version': 1,
+    }})
+
+
+# ---------------------------
+# Inbox Version
+# ---------------------------
+@receiver(post_save, sender=Reminder)
+def bump_inbox_on_reminder_save(sender, instance, **kwargs):
+    audience = reminder_audiences([instance])[instance.pk]
+    bump_counters({uid: {'inbox_version': 1} for uid in audience})
+
+
+@receiver(pre_delete, sender=Reminder)
+def bump_inbox_on_reminder_delete(sender, instance, **kwargs):
+    if is_muted('tasks'):
+        return
+    audience = reminder_audiences([instance])[instance.pk]
+    bump_counters({uid: {'inbox_version': 1} for uid in audience})
+
+
+# ---------------------------
+# Search Index
+# ---------------------------
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, **kwargs):
+    index_objects(Task, [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    if is_muted('tasks'):
+        return
+    remove_objects(Task, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def index_task_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Assignee usernames are indexed with the task.
+    """
+    if action in ('post_clear', 'post_remove'):
+        pk_set = getattr(instance, '_removed_pks', set())
+    elif action != 'post_add':
+        return
+    index_objects(Task, pk_set if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Complaint)
+def index_complaint(sender, instance, **kwargs):
+    index_objects(Complaint, [instance.pk])
+
+
+@receiver(post_delete, sender=Complaint)
+def unindex_complaint(sender, instance, **kwargs):
+    remove_objects(Complaint, [instance.pk])
+
+
+@receiver(pre_save, sender=User)
+def stash_username(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; skip the lookup for those
+    if update_fields is None or 'username' in update_fields:
+        _stash_old_values(instance, 'username')
+
+
+@receiver(post_save, sender=User)
+def reindex_renamed_user(sender, instance, created, **kwargs):
+    old = instance.__dict__.pop('_old_username', None)
+    if created or old is None or old == instance.username:
+        return
+    index_objects(Task, Task.objects.visible_to(instance).values_list('id', flat=True))
+    index_objects(Complaint, Complaint.objects.filter(user=instance).values_list('id', flat=True))
+
+
+# ---------------------------
+# Task Access
+# ---------------------------
+@receiver(post_save, sender=Task)
+def sync_task_owner(sender, instance, created, **kwargs):
+    if created:
+        TaskAccess.objects.create(task=instance, user_id=instance.user_id, role=TaskAccess.ROLE_OWNER)
+        return
+    old = getattr(instance, '_old_user_id', None)
+    if old is not None and old != instance.user_id:
+        set_owners({instance.pk: instance.user_id})
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def sync_task_assignees(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_clear', 'post_remove'):
+        pk_set, sync = getattr(instance, '_removed_pks', set()), revoke_assignees
+    elif action == 'post_add':
+        sync = grant_assignees
+    else:
+        return
+
+    if reverse:
+        sync([(task_id, instance.pk) for task_id in pk_set])
+        task_ids = pk_set
+    else:
+        sync([(instance.pk, user_id) for user_id in pk_set])
+        task_ids = [instance.pk]
+    # The assignee list is part of the task for delta sync, and newly
+    # assigned users must see the task as changed
+    if pk_set:
+        Task.objects.filter(id__in=task_ids).update(updated_at=timezone.now())
+
+
+# ---------------------------
+# Sync Tombstones
+# ---------------------------
+@receiver(pre_delete, sender=Task)
+def tombstone_task(sender, instance, **kwargs):
+    if is_muted('tasks'):
+        return
+    record_deleted_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Complaint)
+def tombstone_complaint(sender, instance, **kwargs):
+    record_gone(SyncTombstone.KIND_COMPLAINT, [(instance.pk, uid) for uid in complaint_audience(instance)])
@@ -0,0 +1,371 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q, F, Count, Sum
+from django.utils import timezone
+from .models import Task, Reminder, Complaint, ComplaintRollup, ResolutionSketch, Notification, UserCounter
+from .sketches import QuantileSketch
+
+COUNTER_FIELDS = [
+    'total_tasks', 'completed_tasks', 'created_tasks', 'assigned_tasks',
+    'complaints', 'resolved_complaints', 'unread_notifications',
+]
+
+
+# ---------------------------
+# Complaint Stats
+# ---------------------------
+def complaint_stats():
+    """
+    Complaint totals per status, read from the rollup table.
+    """
+    by_status = defaultdict(int)
+    for status, n in ComplaintRollup.objects.filter(tag__isnull=True).values_list('status', 'count'):
+        by_status[status] += n
+    return {
+        'total_complaints': sum(by_status.values()),
+        'pending_complaints': by_status['Pending'],
+        'in_progress_complaints': by_status['In Progress'],
+        'resolved_complaints': by_status['Resolved'],
+    }
+
+
+def complaint_breakdown(tag_id=None):
+    """
+    {complaint_type: {status: count}} for every type and status, over all
+    complaints or only those carrying `tag_id`. One query on the rollups.
+    """
+    breakdown = {t: {s: 0 for s, _ in Complaint.STATUS_CHOICES} for t, _ in Complaint.COMPLAINT_TYPES}
+    rows = ComplaintRollup.objects.filter(tag_id=tag_id).values_list('complaint_type', 'status', 'count')
+    for complaint_type, status, n in rows:
+        breakdown.setdefault(complaint_type, {})[status] = n
+    return breakdown
+
+
+def complaint_count(status=None, complaint_type=None, tag_id=None):
+    """
+    How many complaints match the filters, summed from the rollups.
+    """
+    rows = ComplaintRollup.objects.filter(tag_id=tag_id)
+    if status:
+        rows = rows.filter(status=status)
+    if complaint_type:
+        rows = rows.filter(complaint_type=complaint_type)
+    return rows.aggregate(n=Sum('count'))['n'] or 0
+
+
+# ---------------------------
+# Complaint Rollups
+# ---------------------------
+def rollup_keys(complaint_type, status, tag_ids=()):
+    """
+    The rollup rows a complaint counts towards: the overall total and one per tag.
+    """
+    return [(complaint_type, status, None), *((complaint_type, status, tag_id) for tag_id in tag_ids)]
+
+
+def bump_complaint_rollups(deltas):
+    """
+    Apply deltas given as {(complaint_type, status, tag_id or None): delta}.
+    Missing rows are created first; rows sharing a delta get one UPDATE.
+    """
+    deltas = {key: d for key, d in deltas.items() if d}
+    if not deltas:
+        return
+
+    ComplaintRollup.objects.bulk_create([
+        ComplaintRollup(complaint_type=complaint_type, status=status, tag_id=tag_id)
+        for complaint_type, status, tag_id in deltas
+    ], ignore_conflicts=True)
+
+    groups = defaultdict(Q)
+    for (complaint_type, status, tag_id), d in deltas.items():
+        groups[d] |= Q(complaint_type=complaint_type, status=status, tag_id=tag_id)
+    for d, rows in groups.items():
+        ComplaintRollup.objects.filter(rows).update(count=F('count') + d)
+
+
+def rebuild_complaint_rollups():
+    """
+    Recompute every rollup row with two grouped queries.
+    Returns the number of rows written.
+    """
+    rows = [
+        ComplaintRollup(complaint_type=complaint_type, status=status, count=n)
+        for complaint_type, status, n in
+        Complaint.objects.order_by().values_list('complaint_type', 'status').annotate(n=Count('id'))
+    ]
+    rows += [
+        ComplaintRollup(complaint_type=complaint_type, status=status, tag_id=tag_id, count=n)
+        for complaint_type, status, tag_id, n in
+        Complaint.tags.through.objects.order_by().values_list(
+            'complaint__complaint_type', 'complaint__status', 'tag_id').annotate(n=Count('id'))
+    ]
+    with transaction.atomic():
+        ComplaintRollup.objects.all().delete()
+        ComplaintRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# ---------------------------
+# Resolution Times
+# ---------------------------
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def resolution_entry(complaint_type, created_at, resolved_at):
+    """
+    (complaint_type, day, seconds) a resolved complaint adds to the sketches.
+    """
+    seconds = max((resolved_at - created_at).total_seconds(), 0)
+    return complaint_type, timezone.localdate(resolved_at), seconds
+
+
+def bump_resolution_sketches(added=(), removed=()):
+    """
+    Add and remove resolution_entry() values, one locked read-modify-write
+    per sketch touched.
+    """
+    changes = defaultdict(list)
+    for complaint_type, day, seconds in added:
+        changes[(complaint_type, day)].append((seconds, 1))
+    for complaint_type, day, seconds in removed:
+        changes[(complaint_type, day)].append((seconds, -1))
+
+    for (complaint_type, day), values in changes.items():
+        with transaction.atomic():
+            ResolutionSketch.objects.get_or_create(complaint_type=complaint_type, day=day)
+            row = ResolutionSketch.objects.select_for_update().get(complaint_type=complaint_type, day=day)
+            sketch = QuantileSketch.from_dict(row.sketch)
+            for seconds, count in values:
+                sketch.add(seconds, count)
+            row.sketch = sketch.to_dict()
+            row.save(update_fields=['sketch'])
+
+
+def resolution_percentiles(days=30, percentiles=PERCENTILES):
+    """
+    {complaint_type: {'count': n, 'p50': timedelta, ...}} over complaints
+    resolved in the last `days` days, merged from the daily sketches.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    merged = defaultdict(QuantileSketch)
+    for complaint_type, data in ResolutionSketch.objects.filter(day__gte=since).values_list('complaint_type', 'sketch'):
+        merged[complaint_type].merge(QuantileSketch.from_dict(data))
+
+    result = {}
+    for complaint_type, sketch in merged.items():
+        if sketch.count <= 0:
+            continue
+        result[complaint_type] = {'count': sketch.count}
+        for q in percentiles:
+            result[complaint_type][f'p{round(q * 100, 1):g}'] = timedelta(seconds=round(sketch.quantile(q)))
+    return result
+
+
+def rebuild_resolution_sketches(chunk_size=5000):
+    """
+    Recompute every sketch from the resolved complaints in one pass.
+    Returns the number of sketches written.
+    """
+    sketches = defaultdict(QuantileSketch)
+    resolved = Complaint.objects.filter(resolved_at__isnull=False).order_by().values_list(
+        'complaint_type', 'created_at', 'resolved_at')
+    for row in resolved.iterator(chunk_size=chunk_size):
+        complaint_type, day, seconds = resolution_entry(*row)
+        sketches[(complaint_type, day)].add(seconds)
+
+    with transaction.atomic():
+        ResolutionSketch.objects.all().delete()
+        ResolutionSketch.objects.bulk_create([
+            ResolutionSketch(complaint_type=complaint_type, day=day, sketch=sketch.to_dict())
+            for (complaint_type, day), sketch in sketches.items()
+        ], batch_size=1000)
+    return len(sketches)
+
+
+# ---------------------------
+# User Counters
+# ---------------------------
+def get_counters(user):
+    """
+    Return the user's counter row, building it on first access.
+    """
+    try:
+        return UserCounter.objects.get(user=user)
+    except UserCounter.DoesNotExist:
+        rebuild_counters([user.id])
+        return UserCounter.objects.get(user=user)
+
+
+def bump_counters(deltas):
+    """
+    Apply counter deltas, given as {user_id: {field: delta}}.
+    Users sharing the same deltas are updated with one UPDATE.
+    """
+    groups = defaultdict(list)
+    for user_id, changes in deltas.items():
+        key = tuple(sorted((field, d) for field, d in changes.items() if d))
+        if key:
+            groups[key].append(user_id)
+
+    for key, user_ids in groups.items():
+        UserCounter.objects.filter(user_id__in=user_ids).update(
+            **{field: F(field) + d for field, d in key}
+        )
+
+    unread_changed = [uid for uid, changes in deltas.items() if changes.get('unread_notifications')]
+    if unread_changed:
+        invalidate_unread_count(unread_changed)
+
+
+def count_assignments(pairs, sign):
+    """
+    Update counters for (task_id, user_id) assignments that were added
+    (sign=1) or removed (sign=-1), with one query for the tasks involved.
+    """
+    tasks = {
+        t['id']: t for t in
+        Task.objects.filter(id__in={task_id for task_id, _ in pairs}).values('id', 'user_id', 'is_completed')
+    }
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for task_id, user_id in pairs:
+        task = tasks.get(task_id)
+        if task is None:
+            continue
+        deltas[user_id]['assigned_tasks'] += sign
+        deltas[user_id]['inbox_version'] = 1   # the task's reminders changed audience
+        if user_id != task['user_id']:
+            deltas[user_id]['total_tasks'] += sign
+            deltas[user_id]['completed_tasks'] += sign * int(task['is_completed'])
+
+    bump_counters(deltas)
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recompute counters from scratch, for the given users or for everyone.
+    Returns the number of rows written.
+    """
+    through = Task.assigned_to.through
+
+    def scoped(qs, field='user'):
+        if user_ids is None:
+            return qs
+        return qs.filter(**{f'{field}__in': user_ids})
+
+    users = scoped(User.objects.all(), 'id')
+    rows = {uid: dict.fromkeys(COUNTER_FIELDS, 0) for uid in users.values_list('id', flat=True)}
+
+    created = scoped(Task.objects.all()).values('user').annotate(
+        n=Count('id'), done=Count('id', filter=Q(is_completed=True)))
+    for row in created:
+        counters = rows[row['user']]
+        counters['created_tasks'] = row['n']
+        counters['total_tasks'] += row['n']
+        counters['completed_tasks'] += row['done']
+
+    assigned = scoped(through.objects.all()).values('user').annotate(
+        n=Count('id'), done=Count('id', filter=Q(task__is_completed=True)))
+    for row in assigned:
+        counters = rows[row['user']]
+        counters['assigned_tasks'] = row['n']
+        counters['total_tasks'] += row['n']
+        counters['completed_tasks'] += row['done']
+
+    # Tasks a user created AND is assigned to were counted twice above
+    own = scoped(through.objects.filter(task__user=F('user'))).values('user').annotate(
+        n=Count('id'), done=Count('id', filter=Q(task__is_completed=True)))
+    for row in own:
+        counters = rows[row['user']]
+        counters['total_tasks'] -= row['n']
+        counters['completed_tasks'] -= row['done']
+
+    complaints = scoped(Complaint.objects.all()).values('user').annotate(
+        n=Count('id'), resolved=Count('id', filter=Q(status='Resolved')))
+    for row in complaints:
+        counters = rows[row['user']]
+        counters['complaints'] = row['n']
+        counters['resolved_complaints'] = row['resolved']
+
+    from .inbox import unread_q_joined   # core.inbox imports this module
+    unread = scoped(Notification.objects.filter(unread_q_joined())).values('user').annotate(n=Count('id'))
+    for row in unread:
+        rows[row['user']]['unread_notifications'] = row['n']
+
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=uid, **counters) for uid, counters in rows.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=COUNTER_FIELDS + ['updated_at'],
+        batch_size=1000,
+    )
+    invalidate_unread_count(rows)
+    return len(rows)
+
+
+# ---------------------------
+# Unread Notification Count (cached)
+# ---------------------------
+def _unread_cache_key(user_id):
+    return f'core:unread-notifications:{user_id}'
+
+
+def unread_count(user):
+    """
+    The user's unread notification count, served from the
+    UNREAD_COUNT_CACHE cache and filled from the counter row on a miss.
+    """
+    cache = caches[settings.UNREAD_COUNT_CACHE]
+    key = _unread_cache_key(user.id)
+
+    count = cache.get(key)
+    if count is None:
+        count = get_counters(user).unread_notifications
+        cache.set(key, count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread_count(user_ids):
+    """
+    Drop cached counts once the current transaction commits,
+    so a concurrent reader cannot re-cache the old value.
+    """
+    keys = [_unread_cache_key(uid) for uid in user_ids]
+    transaction.on_commit(lambda: caches[settings.UNREAD_COUNT_CACHE].delete_many(keys))
+
+
+# ---------------------------
+# Dashboard Stats
+# ---------------------------
+def dashboard_stats(user, days=7):
+    """
+    Everything the dashboard shows: the user's counter row, the
+    complaint totals from ComplaintRollup and one count of upcoming
+    reminders.
+    """
+    counters = get_counters(user)
+    stats = {
+        'total_tasks': counters.total_tasks,
+        'completed_tasks': counters.completed_tasks,
+        'pending_tasks': counters.pending_tasks,
+        'created_by_me': counters.created_tasks,
+        'assigned_to': counters.assigned_tasks,
+    }
+    stats.update(complaint_stats())
+
+    now = timezone.now()
+    stats['upcoming_reminders'] = Reminder.objects.filter(
+        task_id__in=Task.objects.assigned_ids(user),
+        reminder_time__range=(now, now + timedelta(days=days))
+    ).count()
+
+    total_tasks = stats['total_tasks']
+    total_complaints = stats['total_complaints']
+    stats['task_progress'] = round((stats['completed_tasks'] / total_tasks) * 100) if total_tasks > 0 else 0
+    stats['complaint_progress'] = round((stats['resolved_complaints'] / total_complaints) * 100) if total_complaints > 0 else 0
+    return stats
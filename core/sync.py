@@ -0,0 +1,192 @@
+from datetime import timedelta
+from itertools import accumulate
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Task, TaskAccess, Complaint, SyncTombstone
+from .api import TASK_FIELDS, TASK_RELATED, task_rows, serialize_tasks, complaint_rows, serialize_complaints
+
+TOKEN_SALT = 'core.sync'
+
+# Re-read rows saved slightly before the last position, in case their
+# transaction committed after the client read past them
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+# ---------------------------
+# Tombstones
+# ---------------------------
+def record_gone(kind, pairs):
+    """
+    Record that each (object_id, user_id) is gone for that user.
+    """
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(kind=kind, object_id=object_id, user_id=user_id) for object_id, user_id in pairs
+    ], batch_size=1000)
+
+
+def record_lost_task_access(pairs):
+    """
+    (task_id, user_id) pairs whose access row was just removed: tombstone
+    the ones where the user has no other way to see the task.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    still = set(TaskAccess.objects.filter(
+        task_id__in={task_id for task_id, _ in pairs}, user_id__in={user_id for _, user_id in pairs},
+    ).values_list('task_id', 'user_id'))
+    record_gone(SyncTombstone.KIND_TASK, pairs - still)
+
+
+def record_deleted_tasks(task_ids):
+    """
+    Call before deleting: everyone who could see the tasks gets a tombstone.
+    """
+    record_gone(SyncTombstone.KIND_TASK, set(
+        TaskAccess.objects.filter(task_id__in=task_ids).values_list('task_id', 'user_id')))
+
+
+def complaint_audience(complaint):
+    """
+    Who syncs a complaint: its author and every superuser.
+    """
+    return {complaint.user_id, *User.objects.filter(is_superuser=True).values_list('id', flat=True)}
+
+
+def prune_tombstones(days=None):
+    """
+    Delete tombstones older than SYNC_TOMBSTONE_DAYS; tokens that old are
+    rejected, so no client still needs them. Returns how many went.
+    """
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+# ---------------------------
+# Sync Tokens
+# ---------------------------
+def issue_token(position):
+    return signing.dumps(position, salt=TOKEN_SALT, compress=True)
+
+
+def read_token(token):
+    """
+    The position in a token, or None if it is missing, forged or older
+    than the tombstones we keep (the client must then resync in full).
+    """
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=timedelta(days=settings.SYNC_TOMBSTONE_DAYS))
+    except signing.BadSignature:
+        return None
+
+
+# ---------------------------
+# Changes Since a Token
+# ---------------------------
+def _pack(sent, since):
+    """
+    (id, updated_at) pairs as [id delta, microseconds before `since`],
+    sorted by id, which stay short in a compressed token.
+    """
+    sent = sorted(sent)
+    return [[pk - prev, (since - updated_at) // timedelta(microseconds=1)]
+            for prev, (pk, updated_at) in zip([0] + [pk for pk, _ in sent], sent)]
+
+
+def _unpack(packed, since):
+    ids = accumulate(delta for delta, _ in packed)
+    return {(pk, since - timedelta(microseconds=age)) for pk, (_, age) in zip(ids, packed)}
+
+
+def _changed(queryset, position, limit):
+    """
+    Rows updated after `position` ([updated_at, id, sent versions] or
+    None), oldest first. Rows saved just behind the position are read
+    again, in case their transaction committed after we looked, and the
+    versions (id, updated_at) the client already has are skipped. Returns (rows, new position, more to come).
+    """
+    if not position:
+        rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+        more, rows = len(rows) > limit, rows[:limit]
+        key = (rows[-1]['updated_at'], rows[-1]['id']) if rows else None
+        examined = rows
+        sent = set()
+    else:
+        key = (parse_datetime(position[0]), position[1])
+        sent = _unpack(position[2], key[0]) if len(position) > 2 else set()
+        candidates = list(queryset.filter(updated_at__gte=key[0] - SYNC_OVERLAP)
+                          .order_by('updated_at', 'id')[:limit + len(sent) + 1])
+        rows, examined = [], []
+        for row in candidates:
+            if len(rows) == limit:
+                break
+            examined.append(row)
+            if (row['id'], row['updated_at']) in sent:
+                continue
+            rows.append(row)
+        more = len(candidates) > len(examined)
+        if rows and (rows[-1]['updated_at'], rows[-1]['id']) > key:
+            key = (rows[-1]['updated_at'], rows[-1]['id'])
+        # Stopping early, versions we never got to stay sent; otherwise
+        # the ones missing have left the window or been saved again
+        sent = sent - {(row['id'], row['updated_at']) for row in examined} if more else set()
+
+    if key is None:
+        return rows, position, more
+    sent |= {(row['id'], row['updated_at']) for row in examined if row['updated_at'] >= key[0] - SYNC_OVERLAP}
+    return rows, [key[0].isoformat(), key[1], _pack(sent, key[0])], more
+
+
+def _deleted(user, kind, visible, after, limit):
+    """
+    Ids tombstoned for the user after tombstone id `after`, minus any the
+    user can see again. Returns (ids, new position, more to come).
+    """
+    stones = list(SyncTombstone.objects.filter(user=user, kind=kind, id__gt=after)
+                  .order_by('id').values_list('id', 'object_id')[:limit + 1])
+    more, stones = len(stones) > limit, stones[:limit]
+    ids = {object_id for _, object_id in stones}
+    ids -= set(visible.filter(id__in=ids).values_list('id', flat=True))
+    return sorted(ids), (stones[-1][0] if stones else after), more
+
+
+def sync_changes(user, token, limit=None):
+    """
+    Everything that changed for the user since `token`, plus the token for
+    next time. Without a valid token, the first page of a full sync.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    position = read_token(token)
+    full = position is None
+    if full:
+        # A full listing needs no deletes: start after every current tombstone
+        last = SyncTombstone.objects.filter(user=user).aggregate(last=Max('id'))['last'] or 0
+        position = {'tasks': None, 'complaints': None, 'tasks_gone': last, 'complaints_gone': last}
+
+    tasks = Task.objects.visible_to(user)
+    complaints = Complaint.objects.all() if user.is_superuser else Complaint.objects.filter(user=user)
+    task_fields = [*TASK_FIELDS, *TASK_RELATED]
+
+    task_gone, position['tasks_gone'], more_task_gone = _deleted(
+        user, SyncTombstone.KIND_TASK, tasks, position['tasks_gone'], limit)
+    complaint_gone, position['complaints_gone'], more_complaint_gone = _deleted(
+        user, SyncTombstone.KIND_COMPLAINT, complaints, position['complaints_gone'], limit)
+    changed_tasks, position['tasks'], more_tasks = _changed(
+        task_rows(tasks, task_fields), position['tasks'], limit)
+    changed_complaints, position['complaints'], more_complaints = _changed(
+        complaint_rows(complaints), position['complaints'], limit)
+
+    return {
+        'token': issue_token(position),
+        'full': full,
+        'more': more_tasks or more_complaints or more_task_gone or more_complaint_gone,
+        'tasks': {'changed': serialize_tasks(changed_tasks, task_fields), 'deleted': task_gone},
+        'complaints': {'changed': serialize_complaints(changed_complaints), 'deleted': complaint_gone},
+    }
@@ -0,0 +1,328 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from functools import partial
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from . import api, bulk, exports
+from .models import Task, Reminder, Tag, Complaint, UserCounter
+from .outbox import claim_batch, make_email, queue_emails
+from .query_plans import SUPPORTED_VENDORS, check_query_plans
+from .management.commands.run_reminder_scheduler import Command as SchedulerCommand
+from .reminders import claim_pending_triggers, fire_reminders
+from .search import search
+from .stats import COUNTER_FIELDS, get_counters, rebuild_counters
+from .sync import sync_changes
+
+
+# ---------------------------
+# Dashboard
+# ---------------------------
+class DashboardQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_login(self.user)
+
+    def get_dashboard(self, queries):
+        self.client.get(reverse('dashboard'))   # builds the counter row and caches
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.get_dashboard(8)
+
+        others = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+        now = timezone.now()
+        for i in range(20):
+            task = Task.objects.create(user=self.user, title=f'Task {i}', is_completed=i % 2 == 0)
+            task.assigned_to.add(*others)
+            Reminder.objects.create(task=task, created_by=self.user, title='r',
+                                    reminder_time=now + timedelta(days=1 + i % 5))
+            Complaint.objects.create(user=self.user, subject='s', message='m',
+                                     status=['Pending', 'In Progress', 'Resolved'][i % 3])
+        self.get_dashboard(8)
+
+
+# ---------------------------
+# User Counters
+# ---------------------------
+class TaskCounterTests(TestCase):
+    def counters(self, users):
+        return {u.pk: UserCounter.objects.filter(user=u).values(*COUNTER_FIELDS).get() for u in users}
+
+    def test_owner_change_moves_the_task_between_counters(self):
+        old, new, assignee = users = [User.objects.create_user(name, password='pw')
+                                      for name in ('alice', 'bob', 'carol')]
+        for user in users:
+            get_counters(user)
+        task = Task.objects.create(user=old, title='Report', is_completed=True)
+        task.assigned_to.add(new, assignee)
+        Task.objects.create(user=old, title='Other')
+
+        task.user = new
+        task.save()
+        task.user = assignee
+        task.is_completed = False
+        task.save()
+
+        counted = self.counters(users)
+        rebuild_counters([u.pk for u in users])
+        self.assertEqual(counted, self.counters(users))
+
+
+# ---------------------------
+# Search
+# ---------------------------
+@mock.patch('core.search.search_backend', return_value=None)
+class SearchFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='pw')
+        cls.bob = User.objects.create_user('bobby', password='pw')
+        cls.task = Task.objects.create(user=cls.alice, title='Report', description='quarterly numbers')
+        cls.task.assigned_to.add(cls.bob)
+        cls.complaint = Complaint.objects.create(user=cls.alice, subject='Noise', message='loud neighbours')
+
+    def test_tasks_match_description_and_usernames(self, backend):
+        for text in ('report', 'quarterly', 'alice', 'bobby'):
+            self.assertEqual(list(search(Task.objects.all(), text)), [self.task], text)
+        self.assertEqual(list(search(Task.objects.all(), 'missing')), [])
+
+    def test_complaints_match_message_and_username(self, backend):
+        for text in ('noise', 'neighbours', 'alice'):
+            self.assertEqual(list(search(Complaint.objects.all(), text)), [self.complaint], text)
+
+
+# ---------------------------
+# History Export
+# ---------------------------
+class HistoryExportStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='pw')
+        Task.objects.bulk_create([Task(user=cls.user, title=f'Task {i}') for i in range(10)])
+
+    async def test_first_chunk_arrives_before_sources_are_used_up(self):
+        consumed = []
+        history_rows = exports.history_rows
+
+        def counting_rows(user, chunk_size):
+            for row in history_rows(user, chunk_size):
+                consumed.append(row)
+                yield row
+
+        await self.async_client.aforce_login(self.user)
+        with (mock.patch('core.exports.history_rows', counting_rows),
+              mock.patch('core.views.stream_history_csv', partial(exports.stream_history_csv, chunk_size=2))):
+            response = await self.async_client.get(reverse('export_history'))
+            self.assertTrue(response.is_async)
+
+            content = aiter(response.streaming_content)
+            self.assertEqual(await anext(content), b'Type,Title/Subject,Status,Date/Time\r\n')
+            await anext(content)
+            self.assertLess(len(consumed), 10)
+
+            rest = [chunk async for chunk in content]
+
+        self.assertEqual(len(consumed), 10)
+        rows = list(csv.reader(io.StringIO(b''.join(rest).decode())))
+        self.assertEqual(len(rows), 8)
+
+
+# ---------------------------
+# JSON API Export
+# ---------------------------
+class TaskExportStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='pw')
+        for i in range(5):
+            Task.objects.create(user=cls.user, title=f'Task {i}')
+
+    async def test_ndjson_export_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('core.views.stream_tasks', partial(api.stream_tasks, chunk_size=2)):
+            response = await self.async_client.get(reverse('api_task_export'), {'fields': 'id,title'})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(len(chunks), 3)
+        tasks = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual(sorted(t['title'] for t in tasks), [f'Task {i}' for i in range(5)])
+
+
+# ---------------------------
+# Reminders
+# ---------------------------
+class ReminderTriggerTests(TestCase):
+    def test_rearmed_reminder_pops_up_again(self):
+        user = User.objects.create_user('alice', password='pw')
+        task = Task.objects.create(user=user, title='Report')
+        reminder = Reminder.objects.create(task=task, created_by=user, reminder_time=timezone.now())
+        self.assertEqual(claim_pending_triggers(user), [reminder.pk])
+        self.assertEqual(claim_pending_triggers(user), [])
+
+        # What edit_reminder does
+        reminder.is_triggered = False
+        reminder.save()
+        self.assertEqual(claim_pending_triggers(user), [reminder.pk])
+
+    @override_settings(REMINDER_SCHEDULER_ENABLED=True)
+    def test_failed_dispatch_leaves_the_reminder_unclaimed(self):
+        user = User.objects.create_user('alice', password='pw')
+        task = Task.objects.create(user=user, title='Report')
+        reminder = Reminder.objects.create(task=task, created_by=user, reminder_time=timezone.now())
+
+        with mock.patch('core.reminders.save_notifications', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                fire_reminders([reminder.pk])
+        reminder.refresh_from_db()
+        self.assertFalse(reminder.is_triggered)
+
+        self.assertEqual([r.pk for r in fire_reminders([reminder.pk])], [reminder.pk])
+        self.assertEqual(claim_pending_triggers(user), [reminder.pk])
+
+    @override_settings(REMINDER_SCHEDULER_ENABLED=True)
+    def test_scheduler_retries_a_failed_batch(self):
+        user = User.objects.create_user('alice', password='pw')
+        task = Task.objects.create(user=user, title='Report')
+        reminder = Reminder.objects.create(task=task, created_by=user, reminder_time=timezone.now())
+
+        scheduler = SchedulerCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        scheduler.batch_size, scheduler.heap, scheduler.scheduled = 100, [], {}
+        scheduler.failed, scheduler.synced_at = set(), None
+        scheduler.sync()
+
+        with mock.patch('core.reminders.save_notifications', side_effect=RuntimeError('down')):
+            scheduler.fire_due()
+        self.assertIn('down', scheduler.stderr.getvalue())
+        self.assertIn(reminder.pk, scheduler.scheduled)
+
+        scheduler.sync()
+        scheduler.fire_due()
+        self.assertEqual(scheduler.scheduled, {})
+        self.assertEqual(claim_pending_triggers(user), [reminder.pk])
+
+
+# ---------------------------
+# Email Outbox
+# ---------------------------
+class OutboxLeaseTests(TestCase):
+    def test_workers_lease_disjoint_batches(self):
+        queue_emails([make_email(f'Subject {i}', 'body', ['a@example.com']) for i in range(5)])
+
+        first, second = claim_batch(3), claim_batch(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({e.pk for e in first} & {e.pk for e in second})
+        self.assertEqual(claim_batch(3), [])
+
+
+# ---------------------------
+# Delta Sync
+# ---------------------------
+class SyncOverlapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+
+    def changed(self, response):
+        return [t['title'] for t in response['tasks']['changed']]
+
+    def test_late_commit_behind_the_position_is_picked_up_once(self):
+        first = Task.objects.create(user=self.user, title='first')
+        Task.objects.create(user=self.user, title='second')
+        token = sync_changes(self.user, None)['token']
+
+        # Stamped before 'second' but committed after the client synced
+        late = Task.objects.create(user=self.user, title='late')
+        Task.objects.filter(pk=late.pk).update(updated_at=first.updated_at + timedelta(microseconds=1))
+
+        response = sync_changes(self.user, token)
+        self.assertEqual(self.changed(response), ['late'])
+        self.assertEqual(self.changed(sync_changes(self.user, response['token'])), [])
+
+    def test_late_update_of_a_sent_row_is_picked_up(self):
+        first = Task.objects.create(user=self.user, title='first')
+        Task.objects.create(user=self.user, title='second')
+        token = sync_changes(self.user, None)['token']
+
+        # Saved again after the client synced, stamped behind its position
+        Task.objects.filter(pk=first.pk).update(title='edited',
+                                                updated_at=first.updated_at + timedelta(microseconds=1))
+
+        response = sync_changes(self.user, token)
+        self.assertEqual(self.changed(response), ['edited'])
+        self.assertEqual(self.changed(sync_changes(self.user, response['token'])), [])
+
+    def test_bulk_tagging_shows_up_in_sync(self):
+        task = Task.objects.create(user=self.user, title='tagged')
+        tag = Tag.objects.create(name='urgent')
+        token = sync_changes(self.user, None)['token']
+
+        bulk.tag_tasks([task.pk], tag.pk)
+
+        self.assertEqual([t['tags'] for t in sync_changes(self.user, token)['tasks']['changed']], [['urgent']])
+
+    def test_paging_through_a_burst_sends_each_row_once(self):
+        for i in range(25):
+            Task.objects.create(user=self.user, title=f'Task {i}')
+
+        seen, token, more = [], None, True
+        while more:
+            response = sync_changes(self.user, token, limit=10)
+            seen += self.changed(response)
+            token, more = response['token'], response['more']
+
+        self.assertEqual(sorted(seen), sorted(f'Task {i}' for i in range(25)))
+        self.assertEqual(self.changed(sync_changes(self.user, token, limit=10)), [])
+
+
+# ---------------------------
+# Task List
+# ---------------------------
+class TaskListQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_login(self.user)
+
+    def count_queries(self):
+        self.client.get(reverse('task_list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_fixed(self):
+        Task.objects.create(user=self.user, title='Only')
+        one = self.count_queries()
+
+        others = [User.objects.create_user(f'user{i}', password='pw') for i in range(5)]
+        tags = [Tag.objects.create(name=f'tag{i}') for i in range(5)]
+        for i in range(30):
+            task = Task.objects.create(user=self.user, title=f'Task {i}')
+            task.assigned_to.add(*others)
+            task.tags.add(*tags)
+
+        self.client.get(reverse('task_list'))
+        with self.assertNumQueries(one):
+            self.client.get(reverse('task_list'))
+
+
+# ---------------------------
+# Query Plans
+# ---------------------------
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            self.skipTest(f"EXPLAIN is not checked on {connection.vendor}")
+
+        results = check_query_plans()
+        self.assertTrue(results)
+        full_scans = {name: plan for name, plan, scans in results if scans}
+        self.assertEqual(full_scans, {})
@@ -1,5 +1,7 @@
 from django.db.models.signals import post_save, pre_delete
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
@@ -13,77 +15,38 @@ from datetime import timedelta, date
 from django.contrib.auth.views import PasswordChangeView
 from django.db import models
 from django.core.mail import send_mail
-from django.core.paginator import Paginator
 from django.core.exceptions import PermissionDenied
-from .models import (UserProfile, Task, Reminder, Notification, Complaint, Comment, Attachment, Tag)
+from .models import (UserProfile, Task, Reminder, Notification, ArchivedNotification, Complaint, Comment,
+                     Attachment, Tag)
 from .forms import (TaskForm, ReminderForm, UserForm, ComplaintForm, UserProfileForm, CommentForm, TagForm)
+from .stats import dashboard_stats, complaint_count
+from .inbox import (pop_new_notification, trigger_due_reminders, inbox_version,
+                    next_reminder_due, inbox_etag, etag_is_fresh,
+                    read_watermark, unread_q, read_q, is_read, mark_all_read)
+from .pagination import CursorPaginator
+from .search import search
+from . import bulk
+from .api import parse_fields, task_rows, serialize_tasks, stream_tasks
+from .sync import sync_changes
+from .exports import stream_history_csv
 from django.conf import settings
-import csv
+import asyncio
+import json
 
 # ---------------------------
 # Dashboard View
 # ---------------------------
 @login_required
 def dashboard(request):
-    user = request.user
-
-    # Unique task counts
-    total_tasks = Task.objects.filter(
-        Q(user=user) | Q(assigned_to=user)
-    ).distinct().count()
-
-    completed_tasks = Task.objects.filter(
-        Q(user=user) | Q(assigned_to=user),
-        is_completed=True
-    ).distinct().count()
-
-    pending_tasks = Task.objects.filter(
-        Q(user=user) | Q(assigned_to=user),
-        is_completed=False
-    ).distinct().count()
-
-    # Debug counters (optional display)
-    created_by_me = Task.objects.filter(user=user).distinct().count()
-    assigned_to = Task.objects.filter(assigned_to=user).distinct().count()
-
-    # Progress percentage (avoids division error)
-    progress_percent = round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0
-
-    now = timezone.now()
-    upcoming_cutoff = now + timedelta(days=7)
-
-    upcoming_reminders = Reminder.objects.filter(
-        task__assigned_to=user,
-        reminder_time__range=(now, upcoming_cutoff)
-    ).count()
-
-    total_complaints = Complaint.objects.count()
-    pending_complaints = Complaint.objects.filter(status='Pending').count()
-    resolved_complaints = Complaint.objects.filter(status="Resolved").count()
-
-    notifications_unread = Notification.objects.filter(user=user, is_read=False).count()
-
-    task_progress = round((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-    complaint_progress = round((resolved_complaints / total_complaints) * 100) if total_complaints > 0 else 0
+    stats = dashboard_stats(request.user)
 
     progress_metrics = [
-        {"label": "Task", "value": task_progress, "color": "#2F5A5F"},
-        {"label": "Complaint", "value": complaint_progress, "color": "#C9A75D"},
+        {"label": "Task", "value": stats['task_progress'], "color": "#2F5A5F"},
+        {"label": "Complaint", "value": stats['complaint_progress'], "color": "#C9A75D"},
     ]
 
     context = {
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'created_by_me': created_by_me,
-        'assigned_to': assigned_to,
-        'upcoming_reminders': upcoming_reminders,
-        'total_complaints': total_complaints,
-        'pending_complaints': pending_complaints,
-        'notifications_unread': notifications_unread,
-        'task_progress': task_progress,
-        'complaint_progress': complaint_progress,
-        'resolved_complaints': resolved_complaints,
+        **stats,
         'progress_metrics': progress_metrics,
     }
 
@@ -178,63 +141,68 @@ def user_list(request):
 # ---------------------------
 # Task Views
 # ---------------------------
-@login_required
-def task_list(request):
-    user = request.user
-    tasks = Task.objects.filter(
-        Q(user=user) | Q(assigned_to=user)
-    ).order_by('-created_at').distinct()
-
-    tag_filter = request.GET.get('tag')
+def filter_tasks(tasks, params, user):
+    """
+    Apply the task list filters in `params` (search, tag, status, role,
+    start_date, end_date). Shared by the task list and the API.
+    """
+    tag_filter = params.get('tag')
     if tag_filter:
         if tag_filter.isdigit():
-            tasks = tasks.filter(tags__id=int(tag_filter))
+            tasks = tasks.with_tags(id=int(tag_filter))
         else:
-            tasks = tasks.filter(tags__name__iexact=tag_filter)
+            tasks = tasks.with_tags(name__iexact=tag_filter)
 
-    search_query = request.GET.get('search', '')
+    search_query = params.get('search', '')
     if search_query:
-        tasks = tasks.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(user__username__icontains=search_query) |
-            Q(assigned_to__username__icontains=search_query)
-        )
+        tasks = search(tasks, search_query)
 
-    status_filter = request.GET.get('status')
+    status_filter = params.get('status')
     if status_filter == 'completed':
         tasks = tasks.filter(is_completed=True)
     elif status_filter == 'pending':
         tasks = tasks.filter(is_completed=False)
 
-    role_filter = request.GET.get('role')
+    role_filter = params.get('role')
     if role_filter == 'assigned_to_me':
-        tasks = tasks.filter(assigned_to=user)
+        tasks = tasks.filter(id__in=Task.objects.assigned_ids(user))
     elif role_filter == 'created_by_me':
         tasks = tasks.filter(user=user)
 
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
     if start_date:
         tasks = tasks.filter(due_date__date__gte=start_date)
     if end_date:
         tasks = tasks.filter(due_date__date__lte=end_date)
+    return tasks
+
+
+def task_ordering(tasks):
+    return ('-search_rank', '-id') if 'search_rank' in tasks.query.annotations else ('-created_at', '-id')
+
+
+@login_required
+def task_list(request):
+    user = request.user
+    tasks = filter_tasks(Task.objects.visible_to(user).for_list(), request.GET, user)
 
     # PAGINATION
-    paginator = Paginator(tasks, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(tasks, 10, ordering=task_ordering(tasks),
+                                count_timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    page_obj = paginator.get_page(request)
 
     context = {
         'tasks': page_obj,
         'page_obj': page_obj,
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'role_filter': role_filter,
-        'start_date': start_date,
-        'end_date': end_date,
-        'available_tags': Tag.objects.all(),
-        'tag_filter': tag_filter,
+        'search_query': request.GET.get('search', ''),
+        'status_filter': request.GET.get('status'),
+        'role_filter': request.GET.get('role'),
+        'start_date': request.GET.get('start_date'),
+        'end_date': request.GET.get('end_date'),
+        'available_tags': Tag.objects.only('id', 'name'),
+        'tag_filter': request.GET.get('tag'),
+        'available_users': User.objects.only('id', 'username').order_by('username'),
     }
     return render(request, 'core/task_list.html', context)
 
@@ -242,7 +210,7 @@ def task_list(request):
 def task_detail(request, pk):
     task = get_object_or_404(Task, id=pk)
 
-    if not request.user.is_superuser and task.user != request.user and request.user not in task.assigned_to.all():
+    if not request.user.is_superuser and not Task.objects.visible_to(request.user).filter(pk=task.pk).exists():
         messages.error(request, "You do not have access to view this task.")
         return redirect('task_list')
 
@@ -317,21 +285,62 @@ def delete_task(request, pk):
     return redirect('task_list')
 
 
+@login_required
+def bulk_task_action(request):
+    """
+    Apply one action to every ticked task on the task list. Tasks the user
+    may not touch are skipped and reported, not an error.
+    """
+    if request.method != 'POST':
+        return redirect('task_list')
+
+    action = request.POST.get('action')
+    task_ids = [int(pk) for pk in request.POST.getlist('task_ids') if pk.isdigit()]
+    back = request.POST.get('next', '')
+    if not back.startswith(reverse('task_list')):
+        back = reverse('task_list')
+    if action not in bulk.ACTIONS or not task_ids:
+        messages.error(request, "Select some tasks and an action.")
+        return redirect(back)
+
+    allowed = bulk.allowed_task_ids(request.user, task_ids, action)
+    skipped = len(set(task_ids)) - len(allowed)
+
+    if action == 'complete':
+        done = bulk.complete_tasks(allowed)
+        messages.success(request, f"{done} task(s) marked as completed.")
+    elif action == 'reassign':
+        user_ids = [int(pk) for pk in request.POST.getlist('user_ids') if pk.isdigit()]
+        user_ids = list(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        added, removed = bulk.reassign_tasks(allowed, user_ids)
+        messages.success(request, f"Reassigned {len(allowed)} task(s): {added} assignment(s) added, {removed} removed.")
+    elif action == 'tag':
+        tag = Tag.objects.filter(pk=request.POST.get('tag_id') or None).first()
+        if tag is None:
+            messages.error(request, "Choose a tag to add.")
+            return redirect(back)
+        tagged = bulk.tag_tasks(allowed, tag.pk)
+        messages.success(request, f"Tagged {tagged} task(s) with {tag.name}.")
+    else:
+        deleted = bulk.delete_tasks(allowed)
+        messages.warning(request, f"{deleted} task(s) deleted.")
+
+    if skipped:
+        messages.error(request, f"{skipped} task(s) skipped: you are not allowed to {action} them.")
+    return redirect(back)
+
+
 # ---------------------------
 # Complaint Views
 # ---------------------------
 @login_required
 def complaint_list(request):
-    complaints = Complaint.objects.all().order_by('-created_at')
+    complaints = Complaint.objects.all()
 
     # 1. Search Filter
     search_query = request.GET.get('search', '')
     if search_query:
-        complaints = complaints.filter(
-            Q(subject__icontains=search_query) |
-            Q(message__icontains=search_query) |
-            Q(user__username__icontains=search_query)
-        )
+        complaints = search(complaints, search_query)
 
     # 2. Status Filter
     status_filter = request.GET.get('status', '')
@@ -341,17 +350,22 @@ def complaint_list(request):
     # 3. Tag Filter
     tag_filter = request.GET.get('tag', '')
     if tag_filter:
-        complaints = complaints.filter(tags__id=tag_filter)
+        complaints = complaints.filter(id__in=Complaint.tags.through.objects.filter(
+            tag_id=tag_filter).values('complaint_id'))
 
     # 4. TYPE FILTER (Added this back for you)
     type_filter = request.GET.get('complaint_type', '')
     if type_filter:
         complaints = complaints.filter(complaint_type=type_filter)
 
-    # Pagination
-    paginator = Paginator(complaints.distinct(), 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination; without a search the total comes straight from the rollups
+    ordering = ('-search_rank', '-id') if 'search_rank' in complaints.query.annotations else ('-created_at', '-id')
+    total = None
+    if not search_query and (not tag_filter or tag_filter.isdigit()):
+        total = complaint_count(status_filter, type_filter, int(tag_filter) if tag_filter else None)
+    paginator = CursorPaginator(complaints, 10, ordering=ordering,
+                                count_timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT, count=total)
+    page_obj = paginator.get_page(request)
 
     return render(request, 'core/complaint_list.html', {
         'complaints': page_obj,
@@ -463,8 +477,8 @@ def delete_complaint(request, pk):
 @login_required
 def reminder_list(request):
     reminders = Reminder.objects.filter(
-        Q(task__assigned_to=request.user) | Q(created_by=request.user)
-    ).order_by('-reminder_time').distinct()
+        Q(task_id__in=Task.objects.assigned_ids(request.user)) | Q(created_by=request.user)
+    )
 
     # SEARCH
     search_query = request.GET.get('search', '')
@@ -484,9 +498,9 @@ def reminder_list(request):
         reminders = reminders.filter(reminder_time__date__lte=end_date)
 
     # PAGINATION – 10 per page
-    paginator = Paginator(reminders, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(reminders, 10, ordering=('-reminder_time', '-id'),
+                                count_timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    page_obj = paginator.get_page(request)
 
     return render(request, 'core/reminder_list.html', {
         'reminders': page_obj,
@@ -554,29 +568,20 @@ def edit_reminder(request, pk):
 
 @login_required
 def check_due_reminders(request):
-    now = timezone.now()
+    # Read the version first, so anything changing after this point
+    # produces a different ETag on the next poll
+    version = inbox_version(request.user)
+    if etag_is_fresh(request, version):
+        return HttpResponseNotModified()
 
-    # Only reminders relevant to logged-in user
-    reminders = Reminder.objects.filter(
-        reminder_time__lte=now,
-        is_triggered=False
-    ).filter(
-        Q(task__assigned_to=request.user) |
-        Q(created_by=request.user)
-    ).distinct()
-
-    # Mark reminders as triggered ONLY for this user
-    for r in reminders:
-        r.is_triggered = True
-        r.save()
+    reminders = trigger_due_reminders(request.user)
 
-    return JsonResponse({
-        "has_due": reminders.exists(),
-        "reminders": [
-            {"id": r.pk, "title": r.title, "task": r.task.title}
-            for r in reminders
-        ]
+    response = JsonResponse({
+        "has_due": bool(reminders),
+        "reminders": reminders,
     })
+    response['ETag'] = inbox_etag(version, next_reminder_due(request.user))
+    return response
 
 @login_required
 def delete_reminder(request, pk):
@@ -606,51 +611,40 @@ def history_log(request):
     }
     return render(request, 'core/history_log.html', context)
 
-@login_required
-def export_history(request):
+def stream_chunks(request, chunks):
     """
-    Export all tasks, complaints, and reminders as a CSV file
+    Content for a StreamingHttpResponse built from a sync iterator. Under
+    ASGI, Django reads a sync iterator into a list before sending a byte,
+    so hand it an async iterator that pulls one chunk at a time instead.
     """
-    user = request.user
+    if not isinstance(request, ASGIRequest):
+        return chunks
 
-    # Create the HttpResponse object with CSV header
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="history_log.csv"'
+    chunks = iter(chunks)
+    done = object()
 
-    writer = csv.writer(response)
-    writer.writerow(['Type', 'Title/Subject', 'Status', 'Date/Time'])
-
-    # Tasks
-    tasks = Task.objects.filter(user=user).order_by('-created_at')
-    for task in tasks:
-        status = 'Completed' if task.is_completed else 'Pending'
-        writer.writerow([
-            'Task', 
-            task.title, 
-            status, 
-            task.created_at.strftime('%d-%m-%Y %H:%M')
-        ])
-
-    # Complaints
-    complaints = Complaint.objects.filter(user=user).order_by('-created_at')
-    for complaint in complaints:
-        writer.writerow([
-            'Complaint', 
-            complaint.subject, 
-            complaint.status, 
-            complaint.created_at.strftime('%d-%m-%Y %H:%M')
-        ])
-
-    # Reminders
-    reminders = Reminder.objects.filter(created_by=user).order_by('-reminder_time')
-    for reminder in reminders:
-        writer.writerow([
-            'Reminder', 
-            reminder.title, 
-            '', 
-            reminder.reminder_time.strftime('%d-%m-%Y %H:%M')
-        ])
+    async def pull():
+        try:
+            while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+                yield chunk
+        finally:
+            # Release the cursor when the client disconnects early
+            if hasattr(chunks, 'close'):
+                await sync_to_async(chunks.close)()
 
+    return pull()
+
+
+@login_required
+def export_history(request):
+    """
+    Export all tasks, complaints, and reminders as a CSV file, newest
+    first, streamed as it is read so large histories start downloading
+    at once.
+    """
+    response = StreamingHttpResponse(stream_chunks(request, stream_history_csv(request.user)),
+                                     content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="history_log.csv"'
     return response
 
 
@@ -662,16 +656,24 @@ def notification_list(request):
     """
     Show notifications with pagination, filters and basic date grouping.
     """
-    qs = Notification.objects.filter(user=request.user).order_by('-created_at')
+    # Old read notifications are pruned into the archive (see prune_notifications)
+    archived = request.GET.get('archived') == '1'
+    watermark = read_watermark(request.user)
 
     # --- FILTERS ---
 
-    # Status filter: all / unread / read
+    # Status filter: all / unread / read (everything archived is read)
     status_filter = request.GET.get('status', '')
-    if status_filter == 'unread':
-        qs = qs.filter(is_read=False)
-    elif status_filter == 'read':
-        qs = qs.filter(is_read=True)
+    if archived:
+        qs = ArchivedNotification.objects.filter(user=request.user)
+        if status_filter == 'unread':
+            qs = qs.none()
+    else:
+        qs = Notification.objects.filter(user=request.user)
+        if status_filter == 'unread':
+            qs = qs.filter(unread_q(watermark))
+        elif status_filter == 'read':
+            qs = qs.filter(read_q(watermark))
 
     # Category filter: task / complaint / reminder / system
     category_filter = request.GET.get('category', '')
@@ -688,9 +690,10 @@ def notification_list(request):
         qs = qs.filter(created_at__date__lte=end_date)
 
     # --- PAGINATION ---
-    paginator = Paginator(qs, 10)  # 10 per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # No total here: users can have a very large number of notifications
+    page_obj = CursorPaginator(qs, 10).get_page(request)  # 10 per page
+    for n in page_obj:
+        n.read = archived or is_read(n, watermark)
 
     # --- DATE GROUPING HELPERS ---
     today = date.today()
@@ -698,12 +701,9 @@ def notification_list(request):
 
     context = {
         'notifications': page_obj,
+        'archived': archived,
         'today': today,
         'yesterday': yesterday,
-        'notifications_unread': Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count(),
         # Pass filters back to template so the UI can keep state
         'status_filter': status_filter,
         'category_filter': category_filter,
@@ -722,34 +722,85 @@ def mark_notification_read(request, pk):
     notification.save()
     return redirect('notification_list')
 
+@login_required
+def mark_notification_unread(request, pk):
+    """
+    Keep a single notification unread, even below the read watermark.
+    """
+    notification = get_object_or_404(Notification, pk=pk, user=request.user)
+    notification.is_read = False
+    notification.save()
+    return redirect('notification_list')
+
 @login_required
 def mark_all_notifications_read(request):
     """
-    Mark all notifications for the current user as read.
+    Mark all notifications for the current user as read: the read
+    watermark moves, no notification rows are rewritten.
     """
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_all_read(request.user)
     return redirect('notification_list')
 
 @login_required
 def check_new_notifications(request):
-    qs = Notification.objects.filter(user=request.user, is_read=False, is_popped=False)
-
-    if qs.exists():
-        # Get the newest notification
-        notif = qs.latest('created_at')
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-        notif.is_popped = True   # mark as shown
-        notif.save()
-
-        return JsonResponse({
-            "count": unread_count,
-            'has_new': True,
-            'title': notif.message[:50] if notif.message else "Notification",
-            'message': notif.message,
-            'category': notif.category,
-        })
+    version = inbox_version(request.user)
+    if etag_is_fresh(request, version):
+        return HttpResponseNotModified()
 
-    return JsonResponse({'has_new': False})
+    payload = pop_new_notification(request.user)
+    response = JsonResponse(payload or {'has_new': False})
+    response['ETag'] = inbox_etag(version)
+    return response
+
+
+@login_required
+async def inbox_stream(request):
+    """
+    Server-Sent Events stream pushing new notifications and due reminders.
+    Only served under ASGI; a 204 tells the browser to fall back to polling.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    interval = settings.INBOX_STREAM_INTERVAL
+    lifetime = settings.INBOX_STREAM_LIFETIME
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    async def events():
+        yield f"retry: {interval * 1000}\n\n"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lifetime
+
+        seen_version, next_due = None, None
+
+        # The browser reconnects on its own once the stream ends
+        while loop.time() < deadline:
+            version = await sync_to_async(inbox_version)(user)
+            notification, reminders = None, []
+
+            # Only query when the inbox changed or a reminder fell due
+            if version != seen_version or (next_due and next_due <= timezone.now()):
+                seen_version = version
+                notification = await sync_to_async(pop_new_notification)(user)
+                reminders = await sync_to_async(trigger_due_reminders)(user)
+                next_due = await sync_to_async(next_reminder_due)(user)
+
+            if notification:
+                yield event('notification', notification)
+            if reminders:
+                yield event('reminder', {"has_due": True, "reminders": reminders})
+            if not notification and not reminders:
+                yield ": keep-alive\n\n"
+
+            await asyncio.sleep(interval)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 #---------------------------
@@ -834,4 +885,86 @@ def delete_tag(request, pk):
     tag = get_object_or_404(Tag, pk=pk)
     tag.delete()
     messages.warning(request, f'Tag "{tag.name}" deleted successfully.')
-    return redirect('tag_master')
\ No newline at end of file
+    return redirect('tag_master')
+
+
+# ---------------------------
+# API Views
+# ---------------------------
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+
+def _api_tasks(request):
+    """
+    (visible tasks after the task list filters, requested fields),
+    or raise ValueError for a bad `fields` parameter.
+    """
+    fields = parse_fields(request.GET.get('fields', ''))
+    tasks = filter_tasks(Task.objects.visible_to(request.user), request.GET, request.user)
+    return tasks, fields
+
+
+@login_required
+def api_task_list(request):
+    """
+    One cursor page of tasks as JSON; `limit` sets the page size.
+    """
+    try:
+        tasks, fields = _api_tasks(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    limit = request.GET.get('limit', '')
+    limit = min(int(limit), API_MAX_PAGE_SIZE) if limit.isdigit() and int(limit) > 0 else API_PAGE_SIZE
+
+    ordering = task_ordering(tasks)
+    rows = task_rows(tasks, fields, extra=[o.lstrip('-') for o in ordering])
+    page = CursorPaginator(rows, limit, ordering=ordering).get_page(request)
+
+    return JsonResponse({
+        'results': serialize_tasks(page.object_list, fields),
+        'next': f'{request.path}?{page.next_query}' if page.has_next() else None,
+        'previous': f'{request.path}?{page.previous_query}' if page.has_previous() else None,
+    })
+
+
+@login_required
+def api_task_detail(request, pk):
+    try:
+        fields = parse_fields(request.GET.get('fields', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    tasks = Task.objects.all() if request.user.is_superuser else Task.objects.visible_to(request.user)
+    rows = list(task_rows(tasks.filter(pk=pk), fields))
+    if not rows:
+        return JsonResponse({'error': 'Not found.'}, status=404)
+    return JsonResponse(serialize_tasks(rows, fields)[0])
+
+
+@login_required
+def api_task_export(request):
+    """
+    Every matching task as NDJSON (one JSON object per line), streamed.
+    """
+    try:
+        tasks, fields = _api_tasks(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    rows = stream_tasks(tasks.order_by(*task_ordering(tasks)), fields)
+    response = StreamingHttpResponse(stream_chunks(request, rows), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="tasks.ndjson"'
+    return response
+
+
+@login_required
+def api_sync(request):
+    """
+    Tasks and complaints created, changed or deleted since `token`.
+    Clients apply `deleted` then `changed`, keep the returned token, and
+    call again straight away while `more` is true. Without a token (or
+    with an expired one) `full` is true: drop local data and start over.
+    """
+    return JsonResponse(sync_changes(request.user, request.GET.get('token')))
@@ -150,16 +150,89 @@ SESSION_SAVE_EVERY_REQUEST = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 
+# =========================================================
+# CACHING
+# =========================================================
+
+# Local memory by default. Each process keeps its own copy, so with several
+# workers point this at a shared backend (Redis, Memcached) instead.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-manager',
+    }
+}
+
+# Cache alias and lifetime (seconds) for the unread notification badge count
+UNREAD_COUNT_CACHE = 'default'
+UNREAD_COUNT_CACHE_TIMEOUT = 300
+
+# Cache alias and lifetime (seconds) for the estimated result totals on paginated lists
+PAGINATION_COUNT_CACHE = 'default'
+PAGINATION_COUNT_CACHE_TIMEOUT = 300
+
+# Delta sync (/api/sync/): rows per stream per response, and how long
+# tombstones are kept; older sync tokens get a full resync instead
+SYNC_PAGE_SIZE = 500
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+
+
+# =========================================================
+# REAL-TIME INBOX (SSE)
+# =========================================================
+
+# Seconds between server-side checks on an open /inbox/stream/ connection
+INBOX_STREAM_INTERVAL = 3
+# Seconds before a stream is closed (the browser reconnects automatically)
+INBOX_STREAM_LIFETIME = 300
+
+
+# =========================================================
+# REMINDERS
+# =========================================================
+
+# True when `python manage.py run_reminder_scheduler` is running: reminders
+# are then fired by the scheduler instead of inside the request that saves them
+REMINDER_SCHEDULER_ENABLED = os.getenv('REMINDER_SCHEDULER_ENABLED', 'False') == 'True'
+
+
 # =========================================================
 # EMAIL CONFIGURATION (SECURED)
 # =========================================================
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.getenv('EMAIL_HOST', "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 
 # Secrets are now pulled from the .env file (DO NOT HARDCODE HERE)
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Outbox delivery (python manage.py send_outbox)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60  # seconds before the first retry, doubled after each failure
+
+# Notifications flagged send_email are collected into one email per user per window
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv("NOTIFICATION_DIGEST_WINDOW", 60))  # minutes
+
+# Retention (python manage.py prune_notifications): read notifications older
+# than this many days are moved to the archive table, or deleted when
+# NOTIFICATION_ARCHIVE is False. 0 keeps a category forever.
+NOTIFICATION_RETENTION_DAYS = {
+    'task': int(os.getenv("NOTIFICATION_RETENTION_TASK_DAYS", 90)),
+    'complaint': int(os.getenv("NOTIFICATION_RETENTION_COMPLAINT_DAYS", 180)),
+    'reminder': int(os.getenv("NOTIFICATION_RETENTION_REMINDER_DAYS", 30)),
+    'system': int(os.getenv("NOTIFICATION_RETENTION_SYSTEM_DAYS", 60)),
+}
+NOTIFICATION_ARCHIVE = os.getenv("NOTIFICATION_ARCHIVE", "True") == "True"
+NOTIFICATION_PRUNE_CHUNK = 1000  # rows per transaction
+
+# Notifications sent to many users at once (core.notifications.notify_many)
+# are written this many per transaction
+NOTIFICATION_FANOUT_CHUNK = 5000
+
+# A notification about the same object (user, category, related_id) as an
+# unread one from the last this-many minutes is folded into it; 0 disables
+NOTIFICATION_COALESCE_WINDOW = int(os.getenv("NOTIFICATION_COALESCE_WINDOW", 30))  # minutes
@@ -22,6 +22,7 @@ urlpatterns = [
     path('tasks/edit/<int:pk>/', views.edit_task, name='edit_task'),
     path('tasks/<int:pk>/complete/', views.mark_task_completed, name='mark_task_completed'),
     path('tasks/delete/<int:pk>/', views.delete_task, name='delete_task'),
+    path('tasks/bulk/', views.bulk_task_action, name='bulk_task_action'),
 
     # Reminder Management URLs
     path('reminders/', views.reminder_list, name='reminder_list'),
@@ -39,6 +40,7 @@ urlpatterns = [
     # Notification List URL
     path("notifications/", views.notification_list, name="notification_list"),
     path("notifications/<int:pk>/read/", views.mark_notification_read, name="mark_notification_read"),
+    path("notifications/<int:pk>/unread/", views.mark_notification_unread, name="mark_notification_unread"),
     path("notifications/read-all/", views.mark_all_notifications_read, name="mark_all_notifications_read"),
 
     # History URLs
@@ -64,6 +66,13 @@ urlpatterns = [
 
     path('check_reminders/', views.check_due_reminders, name='check_reminders'),
     path('check_notifications/', views.check_new_notifications, name='check_new_notifications'),
+    path('inbox/stream/', views.inbox_stream, name='inbox_stream'),
+
+    # Read-only JSON API
+    path('api/tasks/', views.api_task_list, name='api_task_list'),
+    path('api/tasks/export/', views.api_task_export, name='api_task_export'),
+    path('api/tasks/<int:pk>/', views.api_task_detail, name='api_task_detail'),
+    path('api/sync/', views.api_sync, name='api_sync'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file